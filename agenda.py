@@ -0,0 +1,89 @@
+# Matemática da agenda sobre minutos desde a meia-noite (inteiros): conversões, grade de horários,
+# intervalos livres (pausas), atrasos e índice de intervalos ocupados. 'HH:MM' só existe na entrada e na saída (JSON/templates).
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time, timedelta
+
+
+# Colunas minuto (SMALLINT) e inicio (DATETIME) calculadas a partir de data + horario nas duas tabelas
+def _migracao(tabela):
+    return [
+        f"ALTER TABLE {tabela} ADD COLUMN minuto SMALLINT NULL, ADD COLUMN inicio DATETIME NULL",
+        f"""
+            UPDATE {tabela}
+            SET minuto = TIME_TO_SEC(CAST(horario AS TIME)) DIV 60, inicio = TIMESTAMP(data, CAST(horario AS TIME))
+        """,
+        f"""
+            ALTER TABLE {tabela}
+            MODIFY minuto SMALLINT NOT NULL, MODIFY inicio DATETIME NOT NULL,
+            ADD KEY idx_{tabela}_usuario_inicio (usuario_id, inicio)
+        """,
+    ]
+
+
+MIGRACAO_INICIO_MINUTO = _migracao('agendamentos') + _migracao('agendamentos_arquivo')
+
+
+# Minutos desde a meia-noite de 'HH:MM' (ou 'HH:MM:SS'), timedelta (colunas TIME do MySQLdb), time ou datetime.
+# Levanta ValueError se o texto não for um horário do dia (00:00 a 23:59)
+def minutos(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, timedelta):
+        return int(valor.total_seconds()) // 60
+    if isinstance(valor, (datetime, time)):
+        return valor.hour * 60 + valor.minute
+    partes = str(valor).split(':')
+    if len(partes) < 2 or not (partes[0].isdigit() and partes[1].isdigit()) or int(partes[0]) >= 24 \
+            or int(partes[1]) >= 60:
+        raise ValueError(f"Horário inválido: {valor!r} (use HH:MM).")
+    return int(partes[0]) * 60 + int(partes[1])
+
+
+def formatar(minuto):
+    return None if minuto is None else f"{minuto // 60:02d}:{minuto % 60:02d}"
+
+
+# Início do agendamento como datetime (valor da coluna inicio)
+def inicio(data, minuto):
+    if isinstance(data, str):
+        data = datetime.strptime(data, '%Y-%m-%d').date()
+    return datetime.combine(data, time()) + timedelta(minutes=minuto)
+
+
+# Inícios entre abertura (inclusive) e fechamento (exclusive), a cada `intervalo` minutos
+def grade(abertura, fechamento, intervalo):
+    return array('h', range(abertura, fechamento, intervalo))
+
+
+# Pares (fim do anterior, início do seguinte) com espaço maior que `intervalo` entre inícios consecutivos
+def lacunas(inicios, intervalo):
+    ordenados = sorted(inicios)
+    return [(a, b) for a, b in zip(ordenados, ordenados[1:]) if b - a > intervalo]
+
+
+# Atraso (minutos) de cada início em relação a `agora`; negativo = ainda não chegou a hora
+def atrasos(inicios, agora):
+    return array('h', (agora - minuto for minuto in inicios))
+
+
+# Intervalos [inicio, fim) com os inícios e os fins ordenados à parte: contar quantos sobrepõem [a, b)
+# custa duas buscas binárias (O(log n)), mesmo com sobreposições entre eles.
+class IndiceIntervalos:
+    def __init__(self, intervalos):
+        ordenados = sorted(intervalos)
+        self._inicios = array('h', (a for a, _ in ordenados))
+        self._fins = array('h', sorted(b for _, b in ordenados))
+
+    def __len__(self):
+        return len(self._inicios)
+
+    # Quantos intervalos sobrepõem [inicio, fim): os que começam antes do fim menos os que terminam até o início
+    def sobreposicoes(self, inicio, fim):
+        return bisect_left(self._inicios, fim) - bisect_right(self._fins, inicio)
+
+    # Minutos somados de todos os intervalos
+    def carga(self):
+        return sum(self._fins) - sum(self._inicios)
@@ -0,0 +1,89 @@
+# Arquivo frio de agendamentos: arquivados e cancelados antigos saem da tabela quente
+# (agendamentos) para agendamentos_arquivo, e o histórico lê as duas tabelas.
+from datetime import date, timedelta
+
+import versoes
+
+TABELA = 'agendamentos_arquivo'
+
+# Colunas copiadas para o arquivo (slot_ativo é gerada e só vale para agendamentos ativos)
+COLUNAS = ['id', 'usuario_id', 'data', 'horario', 'minuto', 'inicio', 'servico', 'servico_id', 'preco', 'duracao',
+           'recurso_id', 'status', 'motivo_cancelamento']
+
+# Status que podem ir para o arquivo: nunca mais mudam
+STATUS_ARQUIVAVEIS = ('Arquivado', 'Cancelado')
+
+ESQUEMA = """
+    CREATE TABLE IF NOT EXISTS agendamentos_arquivo (
+        id INT PRIMARY KEY,
+        usuario_id INT NOT NULL,
+        data DATE NOT NULL,
+        horario VARCHAR(5) NOT NULL,
+        servico VARCHAR(100) NOT NULL,
+        servico_id INT NULL,
+        preco DECIMAL(10, 2) NOT NULL DEFAULT 0,
+        status VARCHAR(20) NOT NULL,
+        motivo_cancelamento TEXT NULL,
+        arquivado_em DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        KEY idx_arquivo_usuario_data_horario (usuario_id, data, horario),
+        KEY idx_arquivo_status_data_horario (status, data, horario)
+    )
+"""
+
+
+def colunas(alias=None):
+    prefixo = f'{alias}.' if alias else ''
+    return ', '.join(prefixo + coluna for coluna in COLUNAS)
+
+
+# A mesma consulta nas duas tabelas, unida com UNION ALL; `{tabela}` marca o nome da tabela.
+# Cada lado usa os próprios índices (o filtro fica dentro de cada SELECT, não sobre a união).
+def em_ambas(sql):
+    return f"({sql.format(tabela='agendamentos')}) UNION ALL ({sql.format(tabela=TABELA)})"
+
+
+def data_limite(horizonte_dias, hoje=None):
+    return (hoje or date.today()) - timedelta(days=horizonte_dias)
+
+
+_CONDICAO = f"data < %s AND status IN ({', '.join(['%s'] * len(STATUS_ARQUIVAVEIS))})"
+
+
+# O que seria movido com esse horizonte: linhas por status e bytes estimados
+# (tamanho médio de linha + índices de agendamentos, segundo o information_schema)
+def relatorio(cur, horizonte_dias):
+    limite = data_limite(horizonte_dias)
+    cur.execute(f"SELECT status, COUNT(*) AS total FROM agendamentos WHERE {_CONDICAO} GROUP BY status",
+                (limite,) + STATUS_ARQUIVAVEIS)
+    por_status = {linha['status']: linha['total'] for linha in cur.fetchall()}
+    cur.execute("""
+        SELECT table_rows AS linhas, data_length AS dados, index_length AS indices
+        FROM information_schema.TABLES
+        WHERE table_schema = DATABASE() AND table_name = 'agendamentos'
+    """)
+    tabela = cur.fetchone() or {}
+    linhas_tabela = tabela.get('linhas') or 0
+    bytes_por_linha = ((tabela.get('dados') or 0) + (tabela.get('indices') or 0)) / linhas_tabela if linhas_tabela else 0
+    total = sum(por_status.values())
+    return {
+        'data_limite': limite,
+        'por_status': por_status,
+        'linhas': total,
+        'bytes_estimados': int(total * bytes_por_linha),
+    }
+
+
+# Move até `tamanho` linhas anteriores a data_limite para o arquivo e devolve quantas moveu.
+# Cada chamada é uma transação curta (o chamador faz o commit); repita até devolver 0.
+# O resumo diário não muda: as linhas só trocam de tabela.
+def mover_lote(cur, data_limite, tamanho=1000):
+    cur.execute(f"SELECT id FROM agendamentos WHERE {_CONDICAO} ORDER BY id LIMIT %s FOR UPDATE",
+                (data_limite,) + STATUS_ARQUIVAVEIS + (tamanho,))
+    ids = [linha['id'] for linha in cur.fetchall()]
+    if not ids:
+        return 0
+    marcadores = ', '.join(['%s'] * len(ids))
+    cur.execute(f"INSERT INTO {TABELA} ({colunas()}) SELECT {colunas()} FROM agendamentos WHERE id IN ({marcadores})", ids)
+    cur.execute(f"DELETE FROM agendamentos WHERE id IN ({marcadores})", ids)
+    versoes.incrementar_versao(cur, 'agendamentos')
+    return len(ids)
@@ -0,0 +1 @@
+# Benchmarks e testes de carga (gerador de dados, cenários e executor: python -m benchmarks.executor)
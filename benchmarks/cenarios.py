@@ -0,0 +1,96 @@
+# Cenários de carga: cada um é uma função (sessao, contexto, rng) que faz uma iteração de um usuário real.
+# As requisições passam pelo app inteiro (rotas, login, pool, MySQL) via cliente de teste do Flask.
+from collections import deque
+from datetime import date, timedelta
+import threading
+import time
+
+from benchmarks.gerador import EMAIL_ADMIN, INTERVALO, PESO_HORA, SENHA, SUFIXO_EMAIL
+import servicos
+
+
+# Cliente de teste do Flask que cronometra cada requisição e registra (rota, status, segundos)
+class Sessao:
+    def __init__(self, app, registrar):
+        self._cliente = app.test_client()
+        self._registrar = registrar
+
+    def entrar(self, email):
+        resposta = self._cliente.post('/login', data={'email': email, 'senha': SENHA})
+        if resposta.status_code != 302:
+            raise RuntimeError(f'Login falhou para {email} (HTTP {resposta.status_code}); rode o gerador antes.')
+
+    def requisitar(self, metodo, rota, url=None, **kwargs):
+        inicio = time.perf_counter()
+        resposta = self._cliente.open(url or rota, method=metodo, **kwargs)
+        self._registrar(f'{metodo} {rota}', resposta.status_code, time.perf_counter() - inicio)
+        return resposta
+
+
+# Dados compartilhados pelos cenários (lidos uma vez, antes da medição)
+def preparar_contexto(cur):
+    hoje = date.today()
+    cur.execute("""
+        SELECT id FROM agendamentos
+        WHERE status = 'Ativo' AND data >= %s AND data <= %s
+        ORDER BY data, horario
+    """, (hoje - timedelta(days=7), hoje + timedelta(days=3)))
+    return {
+        'hoje': hoje,
+        'grade': [f'{hora:02d}:{minuto:02d}' for hora in PESO_HORA for minuto in range(0, 60, INTERVALO)],
+        'servicos': sorted(nome for nome, servico in servicos.catalogo(cur).items() if servico['ativo']),
+        'ids_ativos': deque(linha['id'] for linha in cur.fetchall()),
+        'lock': threading.Lock(),
+    }
+
+
+def _dia_util(rng, hoje, ate=7):
+    while True:
+        dia = hoje + timedelta(days=rng.randint(1, ate))
+        if dia.weekday() != 6:
+            return dia
+
+
+# Corrida por horários: consulta o dia e tenta reservar (302 = reservou, 409 = alguém chegou antes)
+def corrida_reservas(sessao, contexto, rng):
+    dia = _dia_util(rng, contexto['hoje'])
+    sessao.requisitar('GET', '/atualizar-horarios-disponiveis', f'/atualizar-horarios-disponiveis?data={dia}')
+    sessao.requisitar('POST', '/agendar', data={
+        'data': dia.strftime('%Y-%m-%d'),
+        'horario': rng.choice(contexto['grade']),
+        'servico': rng.choice(contexto['servicos']),
+    })
+
+
+# Cliente navegando pela agenda: mês inteiro em bitmap e a grade de um dia
+def consulta_disponibilidade(sessao, contexto, rng):
+    sessao.requisitar('GET', '/disponibilidade', f"/disponibilidade?inicio={contexto['hoje']}&dias=30")
+    dia = _dia_util(rng, contexto['hoje'], 30)
+    sessao.requisitar('GET', '/atualizar-horarios-disponiveis', f'/atualizar-horarios-disponiveis?data={dia}')
+
+
+# Barbeiro atualizando o painel e o histórico de transações
+def painel_admin(sessao, contexto, rng):
+    sessao.requisitar('GET', '/admin/painel')
+    sessao.requisitar('GET', '/admin/transacoes')
+
+
+# Fechamento do dia: conclui agendamentos ativos em lotes de 20 (consome os ids do contexto)
+def conclusao_lote(sessao, contexto, rng):
+    with contexto['lock']:
+        ids = [contexto['ids_ativos'].popleft() for _ in range(min(20, len(contexto['ids_ativos'])))]
+    if ids:
+        sessao.requisitar('POST', '/admin/agendamentos/status', json={'ids': ids, 'status': 'Concluído'})
+
+
+# Nome -> (perfil que faz login, função da iteração)
+CENARIOS = {
+    'corrida_reservas': ('cliente', corrida_reservas),
+    'consulta_disponibilidade': ('cliente', consulta_disponibilidade),
+    'painel_admin': ('admin', painel_admin),
+    'conclusao_lote': ('admin', conclusao_lote),
+}
+
+
+def email_do_perfil(perfil, indice):
+    return EMAIL_ADMIN if perfil == 'admin' else f'cliente{indice}{SUFIXO_EMAIL}'
@@ -0,0 +1,170 @@
+# Executor dos cenários de carga: vazão e p50/p95/p99 por rota, salvos em JSON para comparar commits.
+# Roda o app em processo (cliente de teste do Flask) contra o MySQL configurado no ambiente (BARBEARIA_MYSQL_*,
+# ver config.py); o SQL do app é específico do MySQL (ON DUPLICATE KEY, colunas geradas, FOR UPDATE),
+# então não há substituto em SQLite.
+#
+# Uso:
+#   python -m benchmarks.gerador --clientes 2000 --anos 3
+#   python -m benchmarks.executor --iteracoes 500 --concorrencia 8
+#   python -m benchmarks.executor --cenarios painel_admin --comparar benchmarks/resultados/anterior.json
+import argparse
+from datetime import datetime
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+
+from app import create_app
+from benchmarks.cenarios import CENARIOS, Sessao, email_do_perfil, preparar_contexto
+from extensoes import admissao, mysql
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentil(ordenados, p):
+    if not ordenados:
+        return 0
+    return ordenados[min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))]
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Roda `iteracoes` iterações do cenário divididas entre `concorrencia` usuários simultâneos
+def executar(app, nome, iteracoes, concorrencia, contexto, semente=0):
+    perfil, iteracao = CENARIOS[nome]
+    medicoes = []
+    lock = threading.Lock()
+    restantes = [iteracoes]
+    prontos = threading.Barrier(concorrencia + 1)
+    erros = []
+
+    def registrar(rota, status, segundos):
+        with lock:
+            medicoes.append((rota, status, segundos))
+
+    def usuario(indice):
+        rng = random.Random(semente * 1000 + indice)
+        sessao = Sessao(app, registrar)
+        try:
+            sessao.entrar(email_do_perfil(perfil, indice))
+        except Exception as e:
+            erros.append(e)
+        prontos.wait()
+        if erros:
+            return
+        while True:
+            with lock:
+                if restantes[0] <= 0:
+                    return
+                restantes[0] -= 1
+            iteracao(sessao, contexto, rng)
+
+    threads = [threading.Thread(target=usuario, args=(i,)) for i in range(concorrencia)]
+    for thread in threads:
+        thread.start()
+    prontos.wait()
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+    if erros:
+        raise erros[0]
+
+    rotas = {}
+    for rota, status, segundos in medicoes:
+        dados = rotas.setdefault(rota, {'tempos': [], 'status': {}})
+        dados['tempos'].append(segundos * 1000)
+        dados['status'][str(status)] = dados['status'].get(str(status), 0) + 1
+    return {
+        'iteracoes': iteracoes,
+        'concorrencia': concorrencia,
+        'duracao_s': round(duracao, 3),
+        'requisicoes': len(medicoes),
+        'vazao_rps': round(len(medicoes) / duracao, 2) if duracao else 0,
+        'rotas': {rota: _estatisticas(dados) for rota, dados in sorted(rotas.items())},
+    }
+
+
+def _estatisticas(dados):
+    tempos = sorted(dados['tempos'])
+    return {
+        'requisicoes': len(tempos),
+        'status': dados['status'],
+        'media_ms': round(sum(tempos) / len(tempos), 3),
+        'p50_ms': round(percentil(tempos, 50), 3),
+        'p95_ms': round(percentil(tempos, 95), 3),
+        'p99_ms': round(percentil(tempos, 99), 3),
+    }
+
+
+# Diferença de p95 por rota em relação a uma execução anterior; marca pioras acima da tolerância
+def comparar(atual, anterior, tolerancia=0.10):
+    linhas = []
+    for cenario, resultado in atual['cenarios'].items():
+        base = anterior.get('cenarios', {}).get(cenario, {}).get('rotas', {})
+        for rota, estatisticas in resultado['rotas'].items():
+            if rota not in base or not base[rota]['p95_ms']:
+                continue
+            variacao = estatisticas['p95_ms'] / base[rota]['p95_ms'] - 1
+            marca = '  <-- regressão' if variacao > tolerancia else ''
+            linhas.append(f"{cenario:<26} {rota:<40} p95 {base[rota]['p95_ms']:>9.2f} -> "
+                          f"{estatisticas['p95_ms']:>9.2f} ms ({variacao:+.1%}){marca}")
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Executor dos cenários de carga')
+    parser.add_argument('--cenarios', nargs='+', choices=sorted(CENARIOS), default=list(CENARIOS))
+    parser.add_argument('--iteracoes', type=int, default=200, help='iterações por cenário')
+    parser.add_argument('--concorrencia', type=int, default=4, help='usuários simultâneos')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', help='arquivo JSON (padrão: benchmarks/resultados/<data>_<commit>.json)')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior para comparar os p95')
+    parser.add_argument('--com-limites', action='store_true',
+                        help='mantém os orçamentos por rota (LIMITES_ROTAS); sem ele, só o teto de simultâneas vale')
+    args = parser.parse_args()
+    app = create_app()
+    if not args.com_limites:
+        admissao.rotas = {}
+
+    commit = _commit()
+    resultado = {
+        'commit': commit,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'parametros': {'iteracoes': args.iteracoes, 'concorrencia': args.concorrencia, 'semente': args.semente,
+                       'com_limites': args.com_limites},
+        'cenarios': {},
+    }
+    with app.app_context():
+        with mysql.cursor() as cur:
+            contexto = preparar_contexto(cur)
+    for nome in args.cenarios:
+        resultado['cenarios'][nome] = executar(app, nome, args.iteracoes, args.concorrencia, contexto, args.semente)
+        for rota, estatisticas in resultado['cenarios'][nome]['rotas'].items():
+            print(f"{nome:<26} {rota:<40} n={estatisticas['requisicoes']:<6} p50={estatisticas['p50_ms']:.2f}ms "
+                  f"p95={estatisticas['p95_ms']:.2f}ms p99={estatisticas['p99_ms']:.2f}ms status={estatisticas['status']}")
+        print(f"{nome:<26} vazão={resultado['cenarios'][nome]['vazao_rps']} req/s")
+
+    saida = args.saida or os.path.join(RAIZ, 'benchmarks', 'resultados',
+                                       f"{datetime.now():%Y%m%d-%H%M%S}_{commit or 'sem-commit'}.json")
+    os.makedirs(os.path.dirname(saida), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    print(f'Resultados salvos em {saida}')
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            for linha in comparar(resultado, json.load(arquivo)):
+                print(linha)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+# Gerador de dados sintéticos da barbearia: clientes, horários de funcionamento, anos de agendamentos
+# com mistura realista de status e a planilha financeira. Usa o MySQL configurado no ambiente (ver config.py).
+#
+# Uso:
+#   python -m benchmarks.gerador --clientes 2000 --anos 3 --recursos 3
+#   python -m benchmarks.gerador --limpar   (antes de gerar de novo: reservas repetidas não são descartadas)
+import argparse
+import random
+from datetime import date, timedelta
+
+from flask import current_app
+
+from app import create_app
+import agenda
+from extensoes import mysql
+import financeiro
+import horarios
+import recursos
+import resumo
+import servicos
+from senhas import _gerar_hash
+import versoes
+
+SENHA = 'bench-123'
+EMAIL_ADMIN = 'admin@bench.exemplo.com'
+SUFIXO_EMAIL = '@bench.exemplo.com'
+
+# Segunda a sábado das 09:00 às 19:00, domingo fechado
+HORARIO_FUNCIONAMENTO = {dia: ('09:00', '19:00') for dia in horarios.DIAS_SEMANA[:6]}
+INTERVALO = 30
+
+# Procura por horário (pico no fim da tarde e no sábado) e por serviço
+PESO_HORA = {9: 2, 10: 3, 11: 3, 12: 2, 13: 2, 14: 3, 15: 3, 16: 4, 17: 5, 18: 5}
+PESO_SERVICO = {'Corte Clássico': 5, 'Corte Degradê': 4, 'Barba Completa': 2, 'Corte + Barba': 3, 'Sobrancelha': 1}
+
+
+def _status(rng, dia, hoje):
+    if dia > hoje:
+        return 'Cancelado' if rng.random() < 0.08 else 'Ativo'
+    if rng.random() < 0.12:
+        return 'Cancelado'
+    if dia == hoje:
+        return rng.choice(['Ativo', 'Concluído'])
+    # Concluídos de dias anteriores acabam arquivados pelo "resetar cortes" diário
+    return 'Concluído' if (hoje - dia).days <= 7 or rng.random() < 0.1 else 'Arquivado'
+
+
+def _configurar_horarios(cur):
+    cur.execute("SELECT dia_semana FROM configuracoes")
+    existentes = {linha['dia_semana'] for linha in cur.fetchall()}
+    for dia in horarios.DIAS_SEMANA:
+        abertura, fechamento = HORARIO_FUNCIONAMENTO.get(dia, (None, None))
+        valores = (abertura, fechamento, abertura is None, INTERVALO, dia)
+        if dia in existentes:
+            cur.execute("""
+                UPDATE configuracoes SET hora_abertura = %s, hora_fechamento = %s, fechado = %s, intervalo_agendamento = %s
+                WHERE dia_semana = %s
+            """, valores)
+        else:
+            cur.execute("""
+                INSERT INTO configuracoes (hora_abertura, hora_fechamento, fechado, intervalo_agendamento, dia_semana)
+                VALUES (%s, %s, %s, %s, %s)
+            """, valores)
+    versoes.incrementar_versao(cur, 'configuracoes')
+    horarios.invalidar()
+
+
+# Cadeira 1..N com o mesmo horário da barbearia; devolve os ids
+def _configurar_recursos(cur, quantidade):
+    semana = {dia: ({'hora_abertura': abertura, 'hora_fechamento': fechamento} if abertura else None)
+              for dia in horarios.DIAS_SEMANA
+              for abertura, fechamento in [HORARIO_FUNCIONAMENTO.get(dia, (None, None))]}
+    ids = [recursos.salvar(cur, f'Cadeira {i + 1}', horarios_semana=semana) for i in range(quantidade)]
+    recursos.invalidar()
+    return ids
+
+
+def _criar_usuarios(cur, clientes):
+    senha_hash = _gerar_hash(SENHA, current_app.config['SENHAS_CUSTO'])
+    linhas = [('Admin Bench', EMAIL_ADMIN, senha_hash, 1)]
+    linhas += [(f'Cliente Bench {i}', f'cliente{i}{SUFIXO_EMAIL}', senha_hash, 0) for i in range(clientes)]
+    cur.executemany("INSERT IGNORE INTO usuarios (nome, email, senha, is_admin) VALUES (%s, %s, %s, %s)", linhas)
+    cur.execute("SELECT id FROM usuarios WHERE email LIKE %s AND is_admin = 0 LIMIT %s", ('%' + SUFIXO_EMAIL, clientes))
+    return [linha['id'] for linha in cur.fetchall()]
+
+
+def _agendamentos(rng, clientes, nomes, anos, por_dia, hoje):
+    pesos_servico = [PESO_SERVICO.get(nome, 1) for nome in nomes]
+    grade = [f'{hora:02d}:{minuto:02d}' for hora in PESO_HORA for minuto in range(0, 60, INTERVALO)]
+    pesos_grade = [PESO_HORA[int(horario[:2])] for horario in grade]
+    dia = hoje - timedelta(days=365 * anos)
+    while dia <= hoje + timedelta(days=14):
+        if dia.weekday() != 6:
+            quantidade = min(len(grade), max(0, int(rng.gauss(por_dia * (1.4 if dia.weekday() == 5 else 1), 3))))
+            escolhidos = set()
+            while len(escolhidos) < quantidade:
+                escolhidos.add(rng.choices(grade, pesos_grade)[0])
+            for horario in sorted(escolhidos):
+                servico = rng.choices(nomes, pesos_servico)[0]
+                yield (rng.choice(clientes), dia, horario, servico, _status(rng, dia, hoje))
+        dia += timedelta(days=1)
+
+
+# Recurso para um agendamento ativo pela mesma regra da reserva (recursos.OcupacaoDia: dentro do horário do
+# recurso e abaixo da capacidade), ou None se nenhum couber; os ativos do dia vão para `ativos_do_dia`.
+# Sem isso, ativos sobrepostos no mesmo recurso violariam ck_ocupacao_capacidade (erro 3819) na inserção.
+def _recurso_livre(recursos_do_dia, ativos_do_dia, minuto, duracao):
+    recurso = recursos.OcupacaoDia(recursos_do_dia, ativos_do_dia).escolher(minuto, duracao)
+    if recurso is not None:
+        ativos_do_dia.append({'recurso_id': recurso['id'], 'minuto': minuto, 'duracao': duracao})
+    return recurso
+
+
+# Popula o banco e devolve um resumo do que foi criado. Ativos que não cabem em nenhum recurso são descartados.
+def gerar(cur, clientes=500, anos=2, por_dia=14, semente=42, quantidade_recursos=1):
+    rng = random.Random(semente)
+    hoje = date.today()
+    _configurar_horarios(cur)
+    recurso_ids = _configurar_recursos(cur, quantidade_recursos)
+    ids = _criar_usuarios(cur, clientes)
+    catalogo = {nome: servico for nome, servico in servicos.catalogo(cur).items() if servico['ativo']}
+
+    semana = {dia_semana: [(recurso, abertura, fechamento) for recurso, abertura, fechamento in do_dia
+                           if recurso['id'] in recurso_ids]
+              for dia_semana, do_dia in recursos.da_semana(cur).items()}
+
+    total = 0
+    descartados = 0
+    faturamento = {}
+    lote = []
+    dia_atual, ativos_do_dia = None, []
+    for usuario_id, dia, horario, servico, status in _agendamentos(rng, ids, sorted(catalogo), anos, por_dia, hoje):
+        preco = catalogo[servico]['preco']
+        duracao = catalogo[servico]['duracao']
+        minuto = agenda.minutos(horario)
+        if dia != dia_atual:
+            dia_atual, ativos_do_dia = dia, []
+        if status == 'Ativo':
+            recurso = _recurso_livre(semana[dia.weekday()], ativos_do_dia, minuto, duracao)
+            if recurso is None:
+                descartados += 1
+                continue
+            recurso_id = recurso['id']
+        else:
+            recurso_id = rng.choice(recurso_ids)
+        lote.append((usuario_id, dia, horario, minuto, agenda.inicio(dia, minuto), servico, catalogo[servico]['id'],
+                     preco, duracao, recurso_id, status))
+        if status in ('Concluído', 'Arquivado'):
+            chave = (dia.year, dia.month)
+            faturamento[chave] = faturamento.get(chave, 0) + float(preco)
+        if len(lote) >= 5000:
+            total += _inserir(cur, lote)
+    total += _inserir(cur, lote)
+
+    # Planilha financeira: receita real do mês e despesa ~35% dela
+    anos_gerados = sorted({ano for ano, _ in faturamento})
+    for ano in anos_gerados:
+        financeiro.salvar(cur, ano, {
+            mes: (round(faturamento.get((ano, i + 1), 0), 2), round(faturamento.get((ano, i + 1), 0) * 0.35, 2))
+            for i, mes in enumerate(financeiro.MESES)
+        })
+    resumo.reconstruir(cur)
+    versoes.incrementar_versao(cur, 'agendamentos')
+    return {'clientes': len(ids), 'recursos': len(recurso_ids), 'agendamentos': total,
+            'ativos_descartados': descartados, 'anos_financeiro': anos_gerados}
+
+
+def _inserir(cur, lote):
+    if not lote:
+        return 0
+    cur.executemany("""
+        INSERT INTO agendamentos
+            (usuario_id, data, horario, minuto, inicio, servico, servico_id, preco, duracao, recurso_id, status)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, lote)
+    quantidade = cur.rowcount
+    lote.clear()
+    return quantidade
+
+
+# Remove os usuários sintéticos e os agendamentos deles (o resumo é recalculado)
+def limpar(cur):
+    cur.execute("SELECT id FROM usuarios WHERE email LIKE %s", ('%' + SUFIXO_EMAIL,))
+    ids = [linha['id'] for linha in cur.fetchall()]
+    if ids:
+        marcadores = ', '.join(['%s'] * len(ids))
+        cur.execute(f"DELETE FROM agendamentos WHERE usuario_id IN ({marcadores})", ids)
+        cur.execute(f"DELETE FROM agendamentos_arquivo WHERE usuario_id IN ({marcadores})", ids)
+        cur.execute(f"DELETE FROM usuarios WHERE id IN ({marcadores})", ids)
+    resumo.reconstruir(cur)
+    versoes.incrementar_versao(cur, 'agendamentos')
+    return len(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gerador de dados sintéticos da barbearia')
+    parser.add_argument('--clientes', type=int, default=500)
+    parser.add_argument('--anos', type=int, default=2)
+    parser.add_argument('--por-dia', type=int, default=14, help='agendamentos médios por dia útil')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--recursos', type=int, default=1, help='cadeiras atendendo em paralelo')
+    parser.add_argument('--limpar', action='store_true', help='remove os dados sintéticos em vez de gerar')
+    args = parser.parse_args()
+
+    with create_app().app_context():
+        with mysql.transacao() as cur:
+            if args.limpar:
+                print(f'{limpar(cur)} usuário(s) sintético(s) removido(s).')
+            else:
+                print(gerar(cur, args.clientes, args.anos, args.por_dia, args.semente, args.recursos))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# Tempo de partida de um worker: da importação a frio do app (processo Python novo, sem módulos carregados)
+# até a primeira requisição atendida, em fases (importar, create_app, primeira requisição) e no total
+# visto de fora (inclui subir o interpretador), para cada conjunto de blueprints.
+# A rota padrão (/, sem login) responde com o redirecionamento para /login sem abrir conexão com o MySQL.
+# Também lista os módulos de domínio (fora a infraestrutura comum) que o worker acabou carregando: um
+# worker só com autenticacao não deve trazer nenhum.
+#
+# Uso:
+#   python -m benchmarks.inicializacao --repeticoes 20
+#   python -m benchmarks.inicializacao --conjuntos todos agendamento administracao,financas --rota /login
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FASES = ['importar_ms', 'create_app_ms', 'primeira_requisicao_ms', 'processo_ms']
+
+# Módulos carregados por todo worker (fábrica, extensões, configuração, agendador, métricas)
+INFRAESTRUTURA = {'app', 'cache', 'cache_http', 'comandos', 'config', 'db', 'eventos', 'extensoes',
+                  'instrumentacao', 'limites', 'senhas', 'tarefas', 'versoes'}
+
+
+# Roda dentro do processo medido: nada do app pode ter sido importado antes
+def medir_no_processo(blueprints, rota):
+    inicio = time.perf_counter()
+    from app import create_app
+    importado = time.perf_counter()
+    app = create_app({'BLUEPRINTS': blueprints, 'SECRET_KEY': 'benchmark'})
+    criado = time.perf_counter()
+    resposta = app.test_client().get(rota)
+    atendido = time.perf_counter()
+    return {
+        'importar_ms': (importado - inicio) * 1000,
+        'create_app_ms': (criado - importado) * 1000,
+        'primeira_requisicao_ms': (atendido - criado) * 1000,
+        'status': resposta.status_code,
+        'modulos': len(sys.modules),
+        'dominio': sorted(nome for nome in sys.modules
+                          if os.path.isfile(os.path.join(RAIZ, f'{nome}.py')) and nome not in INFRAESTRUTURA),
+    }
+
+
+# Uma repetição: processo novo, com o tempo total medido de fora
+def medir(blueprints, rota):
+    inicio = time.perf_counter()
+    saida = subprocess.run([sys.executable, '-m', 'benchmarks.inicializacao', '--processo', '--blueprints',
+                            ','.join(blueprints), '--rota', rota],
+                           cwd=RAIZ, capture_output=True, text=True, check=True).stdout
+    medicao = json.loads(saida.strip().splitlines()[-1])
+    medicao['processo_ms'] = (time.perf_counter() - inicio) * 1000
+    return medicao
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tempo de partida: importação a frio até a primeira requisição')
+    parser.add_argument('--conjuntos', nargs='+', default=['todos', 'agendamento'],
+                        help="blueprints carregados, separados por vírgula ('todos' = padrão de BLUEPRINTS)")
+    parser.add_argument('--repeticoes', type=int, default=10)
+    parser.add_argument('--rota', default='/')
+    parser.add_argument('--saida', help='arquivo JSON com as medições')
+    parser.add_argument('--processo', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--blueprints', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.processo:
+        print(json.dumps(medir_no_processo(tuple(args.blueprints.split(',')), args.rota)))
+        return
+
+    from config import PADRAO
+    resultado = {'rota': args.rota, 'repeticoes': args.repeticoes, 'conjuntos': {}}
+    for conjunto in args.conjuntos:
+        blueprints = PADRAO['BLUEPRINTS'] if conjunto == 'todos' else tuple(conjunto.split(','))
+        medicoes = [medir(blueprints, args.rota) for _ in range(args.repeticoes)]
+        resumo = {fase: {'mediana': round(statistics.median(m[fase] for m in medicoes), 2),
+                         'maximo': round(max(m[fase] for m in medicoes), 2)} for fase in FASES}
+        resumo['status'] = sorted({m['status'] for m in medicoes})
+        resumo['modulos'] = medicoes[-1]['modulos']
+        resumo['dominio'] = medicoes[-1]['dominio']
+        resultado['conjuntos'][conjunto] = resumo
+        print(f"{conjunto:<28} " + ' '.join(f"{fase}={resumo[fase]['mediana']:.1f}" for fase in FASES)
+              + f" modulos={resumo['modulos']} status={resumo['status']}"
+              + f" dominio={','.join(resumo['dominio']) or '-'}")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+        print(f'Resultados salvos em {args.saida}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+# Benchmark do painel do administrador: consultas antigas x snapshot consolidado
+#
+# Uso (com o MySQL local configurado no ambiente, ver config.py):
+#   python benchmarks/painel.py --popular 5000 --repeticoes 200
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+import agenda
+from dashboard import carregar_snapshot
+from extensoes import mysql
+import financeiro
+import resumo
+from servicos import CATALOGO_INICIAL
+
+app = create_app()
+
+STATUS = ['Concluído'] * 6 + ['Cancelado'] * 2 + ['Ativo'] * 2 + ['Arquivado']
+
+
+# Cursor que conta quantas consultas (idas ao banco) foram feitas
+class CursorContador:
+    def __init__(self, cur):
+        self._cur = cur
+        self.consultas = 0
+
+    def execute(self, *args, **kwargs):
+        self.consultas += 1
+        return self._cur.execute(*args, **kwargs)
+
+    def __getattr__(self, nome):
+        return getattr(self._cur, nome)
+
+
+# Insere clientes e agendamentos dos últimos 60 dias (e próximos 7) para o benchmark
+def popular(cur, total_agendamentos, total_clientes=200):
+    cur.executemany(
+        "INSERT INTO usuarios (nome, email, senha, is_admin) VALUES (%s, %s, %s, %s)",
+        [(f'Cliente Bench {i}', f'bench{i}_{time.time_ns()}@exemplo.com', 'x', 0) for i in range(total_clientes)]
+    )
+    cur.execute("SELECT id FROM usuarios WHERE nome LIKE %s", ('Cliente Bench %',))
+    ids = [linha['id'] for linha in cur.fetchall()]
+    hoje = datetime.now().date()
+    linhas = []
+    for _ in range(total_agendamentos):
+        data = hoje + timedelta(days=random.randint(-60, 7))
+        horario = f"{random.randint(9, 18):02d}:{random.choice(['00', '30'])}"
+        status = 'Ativo' if data > hoje else random.choice(STATUS)
+        servico, preco = random.choice(CATALOGO_INICIAL)
+        minuto = agenda.minutos(horario)
+        linhas.append((random.choice(ids), data.strftime('%Y-%m-%d'), horario, minuto, agenda.inicio(data, minuto),
+                       servico, preco, status))
+    cur.executemany(
+        "INSERT INTO agendamentos (usuario_id, data, horario, minuto, inicio, servico, preco, recurso_id, status) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, (SELECT MIN(id) FROM recursos), %s)", linhas
+    )
+    resumo.reconstruir(cur)
+    mysql.connection.commit()
+
+
+# Bateria de consultas que o painel fazia antes do snapshot (mantida só como referência)
+def painel_legado(cur, agora):
+    hoje = agora.strftime('%Y-%m-%d')
+    mes_atual = agora.strftime('%Y-%m')
+    hora = agora.strftime('%H:%M')
+    inicio_semana = agora - timedelta(days=agora.weekday())
+    semana = (inicio_semana.strftime('%Y-%m-%d'), (inicio_semana + timedelta(days=6)).strftime('%Y-%m-%d'))
+    consultas = [
+        ("SELECT * FROM configuracoes ORDER BY FIELD(dia_semana, 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo')", ()),
+        ("SELECT intervalo_agendamento FROM configuracoes LIMIT 1", ()),
+        ("SELECT COUNT(*) as total FROM agendamentos a JOIN usuarios u ON a.usuario_id = u.id WHERE a.data = %s AND a.status NOT IN ('Concluído', 'Arquivado') AND a.horario >= %s", (hoje, hora)),
+        ("SELECT COUNT(*) as total FROM agendamentos a JOIN usuarios u ON a.usuario_id = u.id WHERE a.data = %s AND a.status = 'Concluído'", (hoje,)),
+        ("SELECT a.*, u.nome AS cliente_nome FROM agendamentos a JOIN usuarios u ON a.usuario_id = u.id WHERE a.data = %s AND a.status NOT IN ('Concluído', 'Arquivado') AND a.horario >= %s ORDER BY a.horario LIMIT 5", (hoje, hora)),
+        ("SELECT a.*, u.nome AS cliente_nome FROM agendamentos a JOIN usuarios u ON a.usuario_id = u.id WHERE a.data = %s AND a.status NOT IN ('Concluído', 'Arquivado') AND a.horario < %s", (hoje, hora)),
+        ("SELECT a.servico FROM agendamentos a WHERE a.data BETWEEN %s AND %s AND a.status = 'Concluído'", semana),
+        ("SELECT a.servico FROM agendamentos a WHERE a.data = %s AND a.status = 'Concluído'", (hoje,)),
+        ("SELECT a.servico FROM agendamentos a WHERE a.data LIKE %s AND a.status = 'Concluído'", (mes_atual + '%',)),
+        ("SELECT a.servico, COUNT(*) as total FROM agendamentos a WHERE a.data LIKE %s AND a.status = 'Concluído' GROUP BY a.servico ORDER BY total DESC LIMIT 3", (mes_atual + '%',)),
+        ("SELECT mes, receita, despesa FROM financeiro WHERE ano = %s", (agora.year,)),
+        ("SELECT a.servico, u.nome AS cliente_nome, a.data, COUNT(*) as total FROM agendamentos a JOIN usuarios u ON a.usuario_id = u.id WHERE a.status = 'Concluído' GROUP BY a.servico, u.nome, a.data ORDER BY a.data DESC LIMIT 3", ()),
+        ("SELECT a.id, a.servico, a.data, a.horario FROM agendamentos a WHERE a.status = 'Concluído' ORDER BY a.data DESC, a.horario DESC LIMIT 3", ()),
+        ("SELECT SUBSTRING(horario, 1, 2) as hora, COUNT(*) as total FROM agendamentos WHERE data LIKE %s AND status = 'Concluído' GROUP BY hora ORDER BY total DESC LIMIT 2", (mes_atual + '%',)),
+        ("SELECT COUNT(*) as total FROM agendamentos WHERE data LIKE %s AND status = 'Concluído'", (mes_atual + '%',)),
+        ("SELECT DAYNAME(data) as dia, COUNT(*) as total FROM agendamentos WHERE data LIKE %s AND status = 'Concluído' GROUP BY dia ORDER BY total DESC LIMIT 1", (mes_atual + '%',)),
+        ("SELECT COUNT(*) as total FROM agendamentos WHERE data LIKE %s AND status = 'Cancelado'", (mes_atual + '%',)),
+        ("SELECT a.*, u.nome AS cliente_nome FROM agendamentos a JOIN usuarios u ON a.usuario_id = u.id WHERE a.status = 'Arquivado' ORDER BY a.data DESC, a.horario DESC LIMIT 3", ()),
+        ("SELECT a.horario FROM agendamentos a WHERE a.data = %s AND a.status NOT IN ('Concluído', 'Arquivado') AND a.horario >= %s ORDER BY a.horario LIMIT 1", (hoje, hora)),
+        ("SELECT horario FROM agendamentos WHERE data = %s AND status NOT IN ('Concluído', 'Arquivado') ORDER BY horario", (hoje,)),
+    ]
+    for sql, params in consultas:
+        cur.execute(sql, params)
+        cur.fetchall()
+
+
+# Painel atual: configurações + snapshot + financeiro
+def painel_snapshot(cur, agora):
+    cur.execute("SELECT * FROM configuracoes ORDER BY FIELD(dia_semana, 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo')")
+    configuracoes = cur.fetchall()
+    carregar_snapshot(cur, agora, configuracoes[0]['intervalo_agendamento'] if configuracoes else 30)
+    financeiro.serie_anual(cur, agora.year)
+
+
+def medir(nome, funcao, repeticoes):
+    tempos = []
+    consultas = 0
+    for _ in range(repeticoes):
+        cur = CursorContador(mysql.connection.cursor())
+        inicio = time.perf_counter()
+        funcao(cur, datetime.now())
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        consultas = cur.consultas
+        cur.close()
+    p95 = statistics.quantiles(tempos, n=20)[-1] if len(tempos) > 1 else tempos[0]
+    print(f"{nome:<10} consultas={consultas:<3} p50={statistics.median(tempos):.2f}ms p95={p95:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do painel do administrador')
+    parser.add_argument('--popular', type=int, default=0, help='quantidade de agendamentos a inserir antes de medir')
+    parser.add_argument('--repeticoes', type=int, default=100)
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.popular:
+            popular(mysql.connection.cursor(), args.popular)
+        medir('antes', painel_legado, args.repeticoes)
+        medir('depois', painel_snapshot, args.repeticoes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+# Teste de carga de reservas concorrentes: várias threads disputando os mesmos horários, com serviços de
+# durações diferentes (inícios distintos também se sobrepõem). Confere que nenhum recurso fica com mais
+# agendamentos ativos simultâneos do que a capacidade, em nenhum minuto do dia, e mede a vazão.
+#
+# Uso (com o MySQL local configurado no ambiente, ver config.py, e as migrações aplicadas):
+#   python benchmarks/reserva_concorrente.py --threads 32 --tentativas 50
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import MySQLdb
+import MySQLdb.cursors
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agenda
+import config
+import reservas
+
+CONFIG = config.carregar()
+HORARIOS_DISPUTADOS = ['09:00', '09:30', '10:00', '10:30', '18:00', '18:30']
+# 30, 60 e 15 minutos no catálogo inicial
+SERVICOS_DISPUTADOS = ['Corte Clássico', 'Corte + Barba', 'Sobrancelha']
+
+
+def conectar():
+    return MySQLdb.connect(
+        host=CONFIG['MYSQL_HOST'], port=CONFIG['MYSQL_PORT'], user=CONFIG['MYSQL_USER'],
+        passwd=CONFIG['MYSQL_PASSWORD'], db=CONFIG['MYSQL_DB'], cursorclass=MySQLdb.cursors.DictCursor, charset='utf8mb4'
+    )
+
+
+def limpar(cur, data):
+    cur.execute("DELETE FROM agendamentos WHERE data = %s", (data,))
+    cur.execute("DELETE FROM agendamentos_resumo WHERE data = %s", (data,))
+
+
+def cliente(usuario_id, data, tentativas, resultados):
+    conexao = conectar()
+    cur = conexao.cursor()
+    sucessos = conflitos = esperas = 0
+    for _ in range(tentativas):
+        try:
+            reservas.reservar(cur, usuario_id, data, random.choice(HORARIOS_DISPUTADOS), random.choice(SERVICOS_DISPUTADOS))
+            conexao.commit()
+            sucessos += 1
+        except (reservas.HorarioOcupado, reservas.ForaDoExpediente):
+            conexao.rollback()
+            conflitos += 1
+        except reservas.DiaEmReserva:
+            conexao.rollback()
+            esperas += 1
+        # Liberar o horário de vez em quando para manter a disputa viva
+        if random.random() < 0.3:
+            cur.execute("UPDATE agendamentos SET status = 'Cancelado' WHERE data = %s AND usuario_id = %s AND status = 'Ativo' LIMIT 1",
+                        (data, usuario_id))
+            conexao.commit()
+    cur.close()
+    conexao.close()
+    resultados.append((sucessos, conflitos, esperas))
+
+
+# Recursos que em algum minuto do dia têm mais agendamentos ativos simultâneos que a capacidade:
+# [(recurso_id, HH:MM, simultâneos)], varrendo inícios e fins (um fim no mesmo minuto vem antes de um início)
+def acima_da_capacidade(cur, data):
+    cur.execute("""
+        SELECT a.recurso_id, a.minuto, a.duracao, r.capacidade FROM agendamentos a
+        JOIN recursos r ON r.id = a.recurso_id
+        WHERE a.data = %s AND a.status = 'Ativo'
+    """, (data,))
+    marcos = {}
+    capacidades = {}
+    for linha in cur.fetchall():
+        capacidades[linha['recurso_id']] = linha['capacidade']
+        marcos.setdefault(linha['recurso_id'], []).extend([(linha['minuto'], 1), (linha['minuto'] + linha['duracao'], -1)])
+    excedidos = []
+    for recurso_id, pontos in sorted(marcos.items()):
+        simultaneos = 0
+        for minuto, delta in sorted(pontos):
+            simultaneos += delta
+            if simultaneos > capacidades[recurso_id]:
+                excedidos.append((recurso_id, agenda.formatar(minuto), simultaneos))
+                break
+    return excedidos
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga de reservas concorrentes')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--tentativas', type=int, default=50, help='tentativas de reserva por thread')
+    parser.add_argument('--data', default='2099-01-01', help='data usada só pelo teste (apagada no início e no fim)')
+    args = parser.parse_args()
+
+    conexao = conectar()
+    cur = conexao.cursor()
+    cur.execute("SELECT id FROM usuarios ORDER BY id LIMIT %s", (args.threads,))
+    usuarios = [linha['id'] for linha in cur.fetchall()]
+    if not usuarios:
+        sys.exit('Cadastre ao menos um usuário antes de rodar o teste.')
+    limpar(cur, args.data)
+    conexao.commit()
+
+    resultados = []
+    threads = [
+        threading.Thread(target=cliente, args=(usuarios[i % len(usuarios)], args.data, args.tentativas, resultados))
+        for i in range(args.threads)
+    ]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+
+    excedidos = acima_da_capacidade(cur, args.data)
+    limpar(cur, args.data)
+    conexao.commit()
+    cur.close()
+    conexao.close()
+
+    sucessos = sum(s for s, _, _ in resultados)
+    conflitos = sum(c for _, c, _ in resultados)
+    esperas = sum(e for _, _, e in resultados)
+    tentativas = sucessos + conflitos + esperas
+    print(f"tentativas={tentativas} reservas={sucessos} conflitos={conflitos} esperas_esgotadas={esperas} "
+          f"duracao={duracao:.2f}s")
+    print(f"vazão={tentativas / duracao:.1f} tentativas/s ({sucessos / duracao:.1f} reservas/s)")
+    for recurso_id, horario, simultaneos in excedidos:
+        print(f"recurso {recurso_id} acima da capacidade às {horario}: {simultaneos} agendamentos simultâneos")
+    print(f"recursos acima da capacidade: {len(excedidos)}")
+    if excedidos:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# Micro-benchmark do hash de senhas: logins (verificações bcrypt) por segundo e por núcleo
+#
+# Uso:
+#   python benchmarks/senhas.py --custo 12 --logins 200 --processos 4
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from senhas import ServicoSenhas, _gerar_hash, _verificar
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmark do hash de senhas')
+    parser.add_argument('--custo', type=int, default=12)
+    parser.add_argument('--logins', type=int, default=100)
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    senha_hash = _gerar_hash('senha-de-teste', args.custo)
+
+    # Referência: verificação direto na thread, como era feito na view de login
+    inicio = time.perf_counter()
+    for _ in range(args.logins):
+        _verificar('senha-de-teste', senha_hash)
+    duracao = time.perf_counter() - inicio
+    print(f"inline     custo={args.custo} logins/s={args.logins / duracao:.1f} (1 núcleo)")
+
+    # Pool de processos, alimentado por tantas threads quanto processos (como workers do servidor)
+    servico = ServicoSenhas(custo=args.custo, processos=args.processos, fila=args.logins, espera=600)
+    servico.verificar('aquecimento', senha_hash)
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.processos * 2) as threads:
+        resultados = list(threads.map(lambda _: servico.verificar('senha-de-teste', senha_hash), range(args.logins)))
+    duracao = time.perf_counter() - inicio
+    servico.encerrar()
+    assert all(ok for ok, _ in resultados)
+    taxa = args.logins / duracao
+    print(f"pool       custo={args.custo} logins/s={taxa:.1f} processos={args.processos} "
+          f"logins/s por núcleo={taxa / args.processos:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# Cache em memória com expiração (TTL), despejo LRU (por quantidade e, opcionalmente, por bytes)
+# e contador de acertos
+from collections import OrderedDict
+import threading
+import time
+
+
+class CacheLRU:
+    def __init__(self, tamanho=1000, ttl=300.0, limite_bytes=None):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self.limite_bytes = limite_bytes
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+
+    # Valor guardado para a chave, ou `padrao` se ausente/expirado
+    def obter(self, chave, padrao=None):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and item[1] > time.monotonic():
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return item[0]
+            if item is not None:
+                self._remover(chave)
+            self.falhas += 1
+            return padrao
+
+    # `bytes_` é o peso do valor para o limite_bytes (ex.: tamanho de uma resposta renderizada)
+    def guardar(self, chave, valor, bytes_=0):
+        if self.limite_bytes is not None and bytes_ > self.limite_bytes:
+            return
+        with self._lock:
+            if chave in self._itens:
+                self._remover(chave)
+            self._itens[chave] = (valor, time.monotonic() + self.ttl, bytes_)
+            self._bytes += bytes_
+            while len(self._itens) > self.tamanho or (self.limite_bytes is not None and self._bytes > self.limite_bytes):
+                self._remover(next(iter(self._itens)))
+                self.despejos += 1
+
+    def _remover(self, chave):
+        self._bytes -= self._itens.pop(chave)[2]
+
+    def invalidar(self, chave=None):
+        with self._lock:
+            if chave is None:
+                self._itens.clear()
+                self._bytes = 0
+            elif chave in self._itens:
+                self._remover(chave)
+
+    def metricas(self):
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'itens': len(self._itens),
+                'tamanho': self.tamanho,
+                'bytes': self._bytes,
+                'limite_bytes': self.limite_bytes,
+                'ttl': self.ttl,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'despejos': self.despejos,
+                'taxa_acerto': round(self.acertos / consultas, 4) if consultas else 0,
+            }
@@ -0,0 +1,65 @@
+# Cache de respostas HTTP: o ETag vem das versões das tabelas lidas pela view (versoes_tabelas),
+# que as rotas de escrita incrementam. GET condicional com o ETag atual devolve 304 sem consultar as
+# tabelas; respostas renderizadas ficam num LRU limitado por quantidade e por bytes.
+from datetime import datetime
+from functools import wraps
+import hashlib
+
+from flask import Response, make_response, request
+from flask_login import current_user
+
+from cache import CacheLRU
+from versoes import versoes_atuais
+
+# Parte do relógio que entra na chave: a view muda sozinha quando o dia (ou o minuto) vira
+GRANULARIDADES = {'dia': '%Y-%m-%d', 'minuto': '%Y-%m-%d %H:%M'}
+
+
+# Sem `cache`, o LRU é criado em init_app com os limites da configuração. O decorador condicional
+# pode ser aplicado antes disso (views dos blueprints são definidas na importação).
+class CacheRespostas:
+    def __init__(self, banco, cache=None, app=None):
+        self._banco = banco
+        self.cache = cache
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RESPOSTAS_CACHE_TAMANHO', 500)
+        app.config.setdefault('RESPOSTAS_CACHE_BYTES', 32 * 1024 * 1024)
+        self.cache = CacheLRU(app.config['RESPOSTAS_CACHE_TAMANHO'], 24 * 3600, app.config['RESPOSTAS_CACHE_BYTES'])
+
+    def _etag(self, tabelas, granularidade):
+        with self._banco.cursor() as cur:
+            versoes = versoes_atuais(cur, tabelas)
+        usuario = current_user.get_id() if current_user.is_authenticated else ''
+        chave = '|'.join([request.full_path, usuario, datetime.now().strftime(GRANULARIDADES[granularidade])]
+                         + [f'{tabela}={versao}' for tabela, versao in sorted(versoes.items())])
+        return hashlib.sha1(chave.encode()).hexdigest()[:20]
+
+    # Decorador de views GET que só dependem das `tabelas` (por usuário, URL e relógio na granularidade dada)
+    def condicional(self, *tabelas, granularidade='dia'):
+        def decorador(view):
+            @wraps(view)
+            def envolvida(*args, **kwargs):
+                if request.method != 'GET':
+                    return view(*args, **kwargs)
+                etag = self._etag(tabelas, granularidade)
+                if etag in request.if_none_match:
+                    resposta = Response(status=304)
+                else:
+                    guardada = self.cache.obter(etag)
+                    if guardada is not None:
+                        corpo, mimetype = guardada
+                        resposta = Response(corpo, mimetype=mimetype)
+                    else:
+                        resposta = make_response(view(*args, **kwargs))
+                        if resposta.status_code != 200 or resposta.is_streamed:
+                            return resposta
+                        corpo = resposta.get_data()
+                        self.cache.guardar(etag, (corpo, resposta.mimetype), len(corpo))
+                resposta.set_etag(etag)
+                resposta.headers['Cache-Control'] = 'private, no-cache'
+                return resposta
+            return envolvida
+        return decorador
@@ -0,0 +1,64 @@
+# Painel do cliente: próximos agendamentos e histórico paginado, separados no próprio banco
+import agenda
+import arquivo
+from transacoes import codificar_cursor, decodificar_cursor
+
+# Visitas = cortes realizados (concluídos, inclusive os já arquivados)
+STATUS_VISITA = ('Concluído', 'Arquivado')
+
+
+# Agendamentos ativos a partir de agora, do mais próximo ao mais distante (lista completa)
+CONSULTA_PROXIMOS = "SELECT " + arquivo.colunas() + """
+    FROM agendamentos
+    WHERE usuario_id = %s AND status = 'Ativo' AND inicio >= %s
+    ORDER BY inicio
+"""
+
+
+def proximos(cur, usuario_id, agora):
+    cur.execute(CONSULTA_PROXIMOS, (usuario_id, agora.replace(second=0, microsecond=0)))
+    return cur.fetchall()
+
+
+# Histórico nas duas tabelas; com cursor, continua depois da chave (inicio, id) da última linha exibida.
+# Parâmetros: os da consulta interna duas vezes (usuario_id, agora[, inicio, inicio, id], limite) + limite.
+def _consulta_historico(com_cursor):
+    condicoes = "usuario_id = %s AND (status <> 'Ativo' OR inicio < %s)"
+    if com_cursor:
+        condicoes += " AND (inicio < %s OR (inicio = %s AND id < %s))"
+    ordem = " ORDER BY inicio DESC, id DESC LIMIT %s"
+    return ("SELECT * FROM (" + arquivo.em_ambas("SELECT " + arquivo.colunas() + " FROM {tabela} WHERE " + condicoes + ordem)
+            + ") h" + ordem)
+
+
+CONSULTA_HISTORICO = _consulta_historico(False)
+CONSULTA_HISTORICO_CURSOR = _consulta_historico(True)
+
+
+# Uma página do histórico (tudo que não está em `proximos`, da tabela quente e do arquivo frio),
+# do mais recente para o mais antigo, a partir do cursor (exclusive).
+# Devolve (agendamentos, proximo_cursor); levanta ValueError se o cursor for inválido.
+def historico(cur, usuario_id, agora, cursor=None, limite=20):
+    params = [usuario_id, agora.replace(second=0, microsecond=0)]
+    if cursor:
+        data, horario, agendamento_id = decodificar_cursor(cursor)
+        inicio = agenda.inicio(data, agenda.minutos(horario))
+        params += [inicio, inicio, agendamento_id]
+    params.append(limite + 1)
+    cur.execute(CONSULTA_HISTORICO_CURSOR if cursor else CONSULTA_HISTORICO, params * 2 + [limite + 1])
+    agendamentos = cur.fetchall()
+    if len(agendamentos) > limite:
+        agendamentos = agendamentos[:limite]
+        return agendamentos, codificar_cursor(agendamentos[-1])
+    return agendamentos, None
+
+
+# Quantidade de visitas do cliente nas duas tabelas (estatística de fidelidade)
+CONSULTA_VISITAS = ("SELECT SUM(total) AS total FROM ("
+                    + arquivo.em_ambas("SELECT COUNT(*) AS total FROM {tabela} WHERE usuario_id = %s AND status IN (%s, %s)")
+                    + ") v")
+
+
+def contar_visitas(cur, usuario_id):
+    cur.execute(CONSULTA_VISITAS, (usuario_id,) + STATUS_VISITA + (usuario_id,) + STATUS_VISITA)
+    return int(cur.fetchone()['total'] or 0)
@@ -0,0 +1,102 @@
+# Comandos de linha de comando (flask <comando>), registrados por create_app. Os módulos de domínio são
+# importados dentro de cada comando: um worker web não carrega migracoes (que puxa todos eles) só por
+# ter os comandos registrados.
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from extensoes import agendador, mysql
+
+# Aplicar migrações pendentes do esquema
+@click.command('migrar')
+@with_appcontext
+def migrar():
+    import migracoes
+    with mysql.transacao() as cur:
+        novas = migracoes.aplicar(cur)
+    for nome in novas:
+        click.echo(f'Migração aplicada: {nome}')
+    click.echo('Esquema atualizado.' if novas else 'Nenhuma migração pendente.')
+
+# Verificar (via EXPLAIN) se as consultas quentes usam índices
+@click.command('verificar-indices')
+@with_appcontext
+def verificar_indices():
+    import migracoes
+    with mysql.cursor() as cur:
+        problemas = migracoes.verificar_planos(cur)
+    for nome, tabela, indices in problemas:
+        click.echo(f'{nome}: varredura completa em {tabela} (índices possíveis: {indices or "nenhum"})')
+    if problemas:
+        raise click.ClickException(f'{len(problemas)} consulta(s) quente(s) sem uso de índice.')
+    click.echo('Todas as consultas quentes usam índices.')
+
+# Recriar o resumo diário a partir de agendamentos (backfill); muda a versão de 'agendamentos' para as
+# respostas em cache que usam o resumo (painel do administrador) não servirem os números antigos
+@click.command('reconstruir-resumo')
+@with_appcontext
+def reconstruir_resumo():
+    import resumo
+    import versoes
+    with mysql.transacao() as cur:
+        grupos = resumo.reconstruir(cur)
+        versoes.incrementar_versao(cur, 'agendamentos')
+    click.echo(f'Resumo reconstruído: {grupos} grupo(s) (data, serviço, hora, status).')
+
+# Comparar o resumo diário com a tabela agendamentos
+@click.command('verificar-resumo')
+@with_appcontext
+def verificar_resumo():
+    import resumo
+    with mysql.cursor() as cur:
+        divergencias = resumo.verificar(cur)
+    for (data, servico, hora, status), esperado, atual in divergencias:
+        click.echo(f'{data} {hora}h {servico} [{status}]: agendamentos={esperado[0]} (R$ {esperado[1]}) '
+                   f'resumo={atual[0]} (R$ {atual[1]})')
+    if divergencias:
+        raise click.ClickException(f'{len(divergencias)} divergência(s) entre o resumo e agendamentos.')
+    click.echo('Resumo consistente com agendamentos.')
+
+# Mover cancelados/arquivados antigos para o arquivo frio (--simular só mostra o que seria movido)
+@click.command('arquivar-antigos')
+@click.option('--horizonte', type=int, default=None, help='Dias mantidos na tabela quente (padrão: ARQUIVO_HORIZONTE_DIAS).')
+@click.option('--lote', 'tamanho', type=int, default=1000, show_default=True, help='Linhas movidas por transação.')
+@click.option('--simular', is_flag=True, help='Só relata linhas e bytes que seriam movidos.')
+@with_appcontext
+def arquivar_antigos(horizonte, tamanho, simular):
+    import arquivo
+    horizonte = current_app.config['ARQUIVO_HORIZONTE_DIAS'] if horizonte is None else horizonte
+    with mysql.cursor() as cur:
+        previsto = arquivo.relatorio(cur, horizonte)
+    detalhes = ', '.join(f'{status}: {total}' for status, total in sorted(previsto['por_status'].items())) or 'nenhuma'
+    click.echo(f"Anteriores a {previsto['data_limite']}: {previsto['linhas']} linha(s) ({detalhes}), "
+               f"~{previsto['bytes_estimados'] / 1024:.1f} KiB.")
+    if simular:
+        return
+    movidos = 0
+    while True:
+        with mysql.transacao() as cur:
+            quantidade = arquivo.mover_lote(cur, previsto['data_limite'], tamanho)
+        if not quantidade:
+            break
+        movidos += quantidade
+    click.echo(f'{movidos} agendamento(s) movidos para {arquivo.TABELA}.')
+
+# Worker das tarefas em segundo plano (arquivamento no fechamento, faltas, resumo).
+# Pode rodar em mais de um processo/máquina: cada execução é reservada na tabela tarefas.
+@click.command('worker')
+@click.option('--intervalo', type=float, default=None, help='Segundos entre as procuras (padrão: TAREFAS_INTERVALO).')
+@click.option('--uma-vez', is_flag=True, help='Roda só as tarefas vencidas agora e sai.')
+@with_appcontext
+def worker(intervalo, uma_vez):
+    if uma_vez:
+        for nome, sucesso in agendador.executar_pendentes().items():
+            click.echo(f"{nome}: {'ok' if sucesso else 'falhou'}")
+        return
+    click.echo(f'Worker {agendador.identificacao} procurando tarefas vencidas (Ctrl+C para sair).')
+    try:
+        agendador.rodar(current_app.config['TAREFAS_INTERVALO'] if intervalo is None else intervalo)
+    except KeyboardInterrupt:
+        agendador.parar()
+
+COMANDOS = [migrar, verificar_indices, reconstruir_resumo, verificar_resumo, arquivar_antigos, worker]
@@ -0,0 +1,119 @@
+# Configuração do app: valores padrão, sobrescritos por variáveis de ambiente BARBEARIA_<CHAVE>
+# (ex.: BARBEARIA_MYSQL_HOST, BARBEARIA_SECRET_KEY) e, por último, pelo dicionário passado a create_app.
+# O texto da variável é convertido pelo tipo do padrão: números, booleanos (1/true/sim/on), listas
+# separadas por vírgula e dicionários em JSON.
+from functools import partial
+import json
+import os
+
+PREFIXO = 'BARBEARIA_'
+
+PADRAO = {
+    'DEBUG': False,
+
+    # MySQL
+    'MYSQL_HOST': 'localhost',
+    'MYSQL_PORT': 3306,
+    'MYSQL_USER': 'root',
+    'MYSQL_PASSWORD': '',
+    'MYSQL_DB': 'barbeariapy',
+    'MYSQL_CURSORCLASS': 'DictCursor',
+    'MYSQL_POOL_TAMANHO': 10,
+    'MYSQL_POOL_ESPERA': 5.0,
+
+    # Blueprints servidos por este processo (autenticacao sempre é carregado: é o destino dos
+    # redirecionamentos e do login). Um worker só de agendamentos carrega menos módulos e sobe mais rápido.
+    'BLUEPRINTS': ('autenticacao', 'agendamento', 'administracao', 'financas'),
+
+    # Cache dos usuários autenticados (evita consultar usuarios a cada requisição). Cada worker tem o seu:
+    # uma alteração invalida o cache do processo que a fez, e os demais a veem em até USUARIOS_CACHE_TTL segundos
+    'USUARIOS_CACHE_TAMANHO': 1000,
+    'USUARIOS_CACHE_TTL': 300,
+
+    # Histórico do painel do cliente: itens por página e cache da contagem de visitas
+    'CLIENTE_HISTORICO_POR_PAGINA': 20,
+    'VISITAS_CACHE_TTL': 600,
+
+    # Hash de senhas: custo do bcrypt e tamanho da fila do pool de processos
+    'SENHAS_CUSTO': 12,
+    'SENHAS_FILA': 32,
+
+    # Instrumentação: requisições acima do limite (segundos) vão para o log com o SQL executado;
+    # METRICAS_CABECALHO=True devolve Server-Timing/X-Comandos-SQL em cada resposta (depuração)
+    'METRICAS_LIMITE_LENTO': 0.5,
+    'METRICAS_CABECALHO': False,
+
+    # Dias que agendamentos cancelados/arquivados ficam na tabela quente antes de irem para o arquivo frio
+    'ARQUIVO_HORIZONTE_DIAS': 90,
+
+    # Respostas renderizadas em cache (chave = ETag derivado das versões das tabelas): limite de itens e de bytes
+    'RESPOSTAS_CACHE_TAMANHO': 500,
+    'RESPOSTAS_CACHE_BYTES': 32 * 1024 * 1024,
+
+    # Painéis ao vivo (SSE) conectados ao mesmo tempo em cada worker: cada um prende uma thread
+    'EVENTOS_MAXIMO_PAINEIS': 8,
+
+    # Transações por página em /admin/transacoes
+    'TRANSACOES_POR_PAGINA': 50,
+
+    # Tarefas em segundo plano: True roda o agendador numa thread do servidor web; False deixa para o
+    # worker separado (flask worker). Intervalo (segundos) entre as procuras por tarefas vencidas.
+    'TAREFAS_EM_PROCESSO': False,
+    'TAREFAS_INTERVALO': 30,
+
+    # Controle de admissão: orçamento por rota ('blueprint.endpoint' ou 'MÉTODO blueprint.endpoint') em
+    # (capacidade do balde, fichas repostas por segundo), contado por usuário autenticado ou, sem login, por IP.
+    'LIMITES_ROTAS': {
+        'agendamento.atualizar_horarios_disponiveis': (30, 1.0),
+        'agendamento.disponibilidade': (10, 0.2),
+        'POST agendamento.agendar': (5, 1 / 30),
+        'GET agendamento.agendar': (30, 1.0),
+        'POST autenticacao.login': (5, 1 / 60),
+        'POST autenticacao.register': (3, 1 / 300),
+    },
+    'ADMISSAO_ISENTOS': ('static', 'metrics_prometheus', 'administracao.admin_eventos'),
+
+    # Proxies reversos confiáveis à frente do app (nginx, balanceador). Com 0, remote_addr é o endereço da
+    # conexão; com N, o cliente é lido de X-Forwarded-For contando N saltos a partir do fim. Deixe em 0 sem
+    # proxy: o cabeçalho viria do próprio cliente e burlaria os limites por IP.
+    'PROXY_SALTOS': 0,
+}
+
+# Sem padrão aqui: só entram na configuração se definidas. SECRET_KEY ausente vira uma chave aleatória
+# (ver create_app); LIMITES_ARMAZENAMENTO ausente guarda os baldes em memória ('redis://...' divide entre
+# os workers); ADMISSAO_MAXIMO_SIMULTANEAS ausente fica igual a MYSQL_POOL_TAMANHO.
+OPCIONAIS = {
+    'SECRET_KEY': str,
+    'LIMITES_ARMAZENAMENTO': str,
+    'ADMISSAO_MAXIMO_SIMULTANEAS': int,
+}
+
+VERDADEIROS = ('1', 'true', 'sim', 'on', 'yes')
+
+
+def _converter(padrao, texto):
+    if isinstance(padrao, bool):
+        return texto.strip().lower() in VERDADEIROS
+    if isinstance(padrao, (int, float)):
+        return type(padrao)(texto)
+    if isinstance(padrao, tuple):
+        return tuple(item.strip() for item in texto.split(',') if item.strip())
+    if isinstance(padrao, dict):
+        return json.loads(texto)
+    return texto
+
+
+# Configuração final: PADRAO < variáveis BARBEARIA_* do ambiente < `sobrescrever`.
+# Levanta ValueError se uma variável não puder ser convertida para o tipo esperado.
+def carregar(sobrescrever=None, ambiente=None):
+    ambiente = os.environ if ambiente is None else ambiente
+    configuracao = dict(PADRAO)
+    conversores = [(chave, partial(_converter, padrao)) for chave, padrao in PADRAO.items()]
+    for chave, converter in conversores + list(OPCIONAIS.items()):
+        if PREFIXO + chave in ambiente:
+            try:
+                configuracao[chave] = converter(ambiente[PREFIXO + chave])
+            except ValueError as e:
+                raise ValueError(f'{PREFIXO}{chave} inválida: {e}') from e
+    configuracao.update(sobrescrever or {})
+    return configuracao
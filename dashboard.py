@@ -0,0 +1,205 @@
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+from typing import Optional
+import calendar
+
+import agenda
+import arquivo
+from resumo import STATUS_REALIZADOS, ler_periodo
+
+# Mesmos nomes devolvidos pelo DAYNAME() do MySQL
+NOMES_DIAS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+# Resultado consolidado do painel do administrador
+@dataclass
+class PainelSnapshot:
+    cortes_faltam: int = 0
+    cortes_concluidos: int = 0
+    proximos_clientes: list = field(default_factory=list)
+    atrasados: list = field(default_factory=list)
+    recebido_hoje: float = 0
+    recebido_semana: float = 0
+    total_mes: float = 0
+    media_diaria: float = 0
+    media_mensal: float = 0
+    servicos_lucrativos: list = field(default_factory=list)
+    horario_pico: str = "N/A"
+    horario_pico_percent: float = 0
+    dia_mais_clientes: str = "N/A"
+    cancelados: int = 0
+    historico_cortes: list = field(default_factory=list)
+    pedidos_recentes: list = field(default_factory=list)
+    transacoes: list = field(default_factory=list)
+    tempo_falta: Optional[float] = None
+    pausas: list = field(default_factory=list)
+    media_tempo_corte: int = 30
+    tempo_espera_medio: int = 15
+
+    # Variáveis no formato esperado pelo template admin_painel.html
+    def contexto(self):
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+# Limites da semana (segunda a domingo) e do mês de uma data, como intervalos semiabertos [inicio, fim)
+def intervalos_painel(agora):
+    hoje = agora.date()
+    inicio_semana = hoje - timedelta(days=hoje.weekday())
+    fim_semana = inicio_semana + timedelta(days=7)
+    inicio_mes = hoje.replace(day=1)
+    fim_mes = inicio_mes + timedelta(days=calendar.monthrange(hoje.year, hoje.month)[1])
+    return inicio_semana, fim_semana, inicio_mes, fim_mes
+
+
+# Agendamentos do dia (exceto arquivados) com o nome do cliente
+CONSULTA_HOJE = """
+    SELECT a.*, u.nome AS cliente_nome
+    FROM agendamentos a
+    JOIN usuarios u ON a.usuario_id = u.id
+    WHERE a.data = %s AND a.status <> 'Arquivado'
+    ORDER BY a.minuto
+"""
+
+
+def _buscar_hoje(cur, hoje):
+    cur.execute(CONSULTA_HOJE, (hoje,))
+    return cur.fetchall()
+
+
+# Últimos três arquivados, da tabela quente ou do arquivo frio
+_ULTIMOS_ARQUIVADOS = arquivo.em_ambas(
+    "SELECT " + arquivo.colunas('a') + ", u.nome AS cliente_nome "
+    "FROM {tabela} a JOIN usuarios u ON a.usuario_id = u.id "
+    "WHERE a.status = 'Arquivado' ORDER BY a.data DESC, a.horario DESC LIMIT 3"
+)
+
+
+# Concluídos dos três dias mais recentes com atendimento + últimos três arquivados
+CONSULTA_RECENTES = """
+    (SELECT """ + arquivo.colunas('a') + """, u.nome AS cliente_nome
+     FROM agendamentos a
+     JOIN usuarios u ON a.usuario_id = u.id
+     WHERE a.status = 'Concluído' AND a.data >= (
+         SELECT MIN(r.data) FROM (
+             SELECT DISTINCT data FROM agendamentos
+             WHERE status = 'Concluído'
+             ORDER BY data DESC LIMIT 3
+         ) r
+     ))
+    UNION ALL
+    (SELECT * FROM (""" + _ULTIMOS_ARQUIVADOS + """) h ORDER BY data DESC, horario DESC LIMIT 3)
+"""
+
+
+def _buscar_recentes(cur):
+    cur.execute(CONSULTA_RECENTES)
+    return cur.fetchall()
+
+
+def _data_str(valor):
+    return valor.strftime('%Y-%m-%d') if hasattr(valor, 'strftime') else str(valor)
+
+
+# Calcula todas as métricas do painel (hoje / semana / mês) com três consultas;
+# as métricas da semana e do mês vêm do resumo diário (agendamentos_resumo)
+def carregar_snapshot(cur, agora, intervalo_agendamento=30):
+    snapshot = PainelSnapshot()
+    hoje = agora.strftime('%Y-%m-%d')
+    inicio_semana, fim_semana, inicio_mes, fim_mes = intervalos_painel(agora)
+    inicio_semana_str, fim_semana_str = _data_str(inicio_semana), _data_str(fim_semana)
+    inicio_mes_str, fim_mes_str = _data_str(inicio_mes), _data_str(fim_mes)
+
+    # 1. Métricas agregadas da semana e do mês
+    servicos_mes = {}
+    horas_mes = {}
+    dias_mes = {}
+    concluidos_mes = 0
+    for linha in ler_periodo(cur, min(inicio_semana, inicio_mes), max(fim_semana, fim_mes)):
+        data = _data_str(linha['data'])
+        no_mes = inicio_mes_str <= data < fim_mes_str
+        if linha['status'] == 'Cancelado':
+            if no_mes:
+                snapshot.cancelados += linha['total']
+            continue
+        if linha['status'] not in STATUS_REALIZADOS:
+            continue
+        valor = float(linha['receita'])
+        if data == hoje:
+            snapshot.recebido_hoje += valor
+        if inicio_semana_str <= data < fim_semana_str:
+            snapshot.recebido_semana += valor
+        if no_mes:
+            snapshot.total_mes += valor
+            concluidos_mes += linha['total']
+            servicos_mes[linha['servico']] = servicos_mes.get(linha['servico'], 0) + linha['total']
+            horas_mes[linha['hora']] = horas_mes.get(linha['hora'], 0) + linha['total']
+            dia = NOMES_DIAS[datetime.strptime(data, '%Y-%m-%d').weekday()]
+            dias_mes[dia] = dias_mes.get(dia, 0) + linha['total']
+
+    dias_no_mes = calendar.monthrange(agora.year, agora.month)[1]
+    snapshot.media_diaria = snapshot.total_mes / dias_no_mes if dias_no_mes > 0 else 0
+    snapshot.media_mensal = snapshot.total_mes
+    snapshot.servicos_lucrativos = [
+        {'servico': servico, 'total': total}
+        for servico, total in sorted(servicos_mes.items(), key=lambda item: item[1], reverse=True)[:3]
+    ]
+
+    horarios_pico = sorted(horas_mes.items(), key=lambda item: item[1], reverse=True)[:2]
+    if len(horarios_pico) >= 2:
+        hora_inicio = f"{horarios_pico[0][0]}:00"
+        hora_fim = f"{horarios_pico[1][0]}:00"
+        if int(horarios_pico[0][0]) > int(horarios_pico[1][0]):
+            hora_inicio, hora_fim = hora_fim, hora_inicio
+        snapshot.horario_pico = f"das {hora_inicio} às {hora_fim}"
+        total_agendamentos_pico = sum(total for _, total in horarios_pico)
+        snapshot.horario_pico_percent = (total_agendamentos_pico / concluidos_mes * 100) if concluidos_mes > 0 else 0
+    if dias_mes:
+        snapshot.dia_mais_clientes = max(dias_mes.items(), key=lambda item: item[1])[0]
+
+    # 2. Agendamentos de hoje: status, próximos clientes, atrasos e pausas (em minutos desde a meia-noite)
+    agendamentos_hoje = _buscar_hoje(cur, hoje)
+    pendentes = [a for a in agendamentos_hoje if a['status'] != 'Concluído']
+    snapshot.cortes_concluidos = len(agendamentos_hoje) - len(pendentes)
+    minutos_hoje = [a['minuto'] for a in pendentes]
+    for agendamento, atraso in zip(pendentes, agenda.atrasos(minutos_hoje, agenda.minutos(agora))):
+        if atraso <= 0:
+            snapshot.cortes_faltam += 1
+            if len(snapshot.proximos_clientes) < 5:
+                snapshot.proximos_clientes.append(agendamento)
+        else:
+            agendamento['atraso'] = atraso
+            snapshot.atrasados.append(agendamento)
+
+    if snapshot.proximos_clientes:
+        snapshot.tempo_falta = (snapshot.proximos_clientes[0]['inicio'] - agora).total_seconds() / 60
+
+    snapshot.pausas = [f"{agenda.formatar(a)} - {agenda.formatar(b)}"
+                       for a, b in agenda.lacunas(minutos_hoje, intervalo_agendamento)]
+
+    # 3. Pedidos recentes, últimas transações e histórico de cortes
+    concluidos = []
+    for agendamento in _buscar_recentes(cur):
+        if agendamento['status'] == 'Arquivado':
+            snapshot.historico_cortes.append(agendamento)
+        else:
+            concluidos.append(agendamento)
+    concluidos.sort(key=lambda a: a['inicio'], reverse=True)
+
+    # Últimas transações: concluídos e arquivados (o fechamento do dia arquiva os concluídos)
+    realizados = sorted(concluidos + snapshot.historico_cortes, key=lambda a: a['inicio'], reverse=True)
+    snapshot.transacoes = [
+        {'id': a['id'], 'servico': a['servico'], 'data': a['data'], 'horario': a['horario'],
+         'valor': a['preco']}
+        for a in realizados[:3]
+    ]
+    pedidos = {}
+    for a in concluidos:
+        chave = (a['servico'], a['cliente_nome'], _data_str(a['data']))
+        if chave not in pedidos:
+            pedidos[chave] = {'servico': a['servico'], 'cliente_nome': a['cliente_nome'],
+                              'data': a['data'], 'total': 0, 'receita': 0}
+        pedidos[chave]['total'] += 1
+        pedidos[chave]['receita'] += a['preco']
+    snapshot.pedidos_recentes = list(pedidos.values())[:3]
+
+    return snapshot
@@ -0,0 +1,207 @@
+# Acesso ao MySQL com pool de conexões limitado e cursores/transações gerenciados por contexto
+from contextlib import contextmanager
+import threading
+import time
+
+import MySQLdb
+import MySQLdb.cursors
+from flask import g
+
+
+class PoolEsgotado(Exception):
+    pass
+
+
+# Pool de conexões com tamanho máximo, espera limitada e verificação de saúde (ping)
+class PoolConexoes:
+    def __init__(self, criar, tamanho=10, espera=5.0, verificar_apos=30.0):
+        self._criar = criar
+        self.tamanho = tamanho
+        self.espera = espera
+        self.verificar_apos = verificar_apos
+        self._livres = []
+        self._abertas = 0
+        self._em_uso = 0
+        self._cond = threading.Condition()
+        self._checkouts = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+        self._esgotamentos = 0
+        self._descartadas = 0
+
+    # Retira uma conexão do pool, esperando no máximo `espera` segundos por uma livre
+    def obter(self):
+        inicio = time.monotonic()
+        with self._cond:
+            while not self._livres and self._abertas >= self.tamanho:
+                restante = self.espera - (time.monotonic() - inicio)
+                if restante <= 0:
+                    self._esgotamentos += 1
+                    raise PoolEsgotado(f'Nenhuma conexão livre após {self.espera:.1f}s (pool com {self.tamanho}).')
+                self._cond.wait(restante)
+            if self._livres:
+                conexao, devolvida_em = self._livres.pop()
+            else:
+                conexao, devolvida_em = None, None
+                self._abertas += 1
+            self._em_uso += 1
+            espera = time.monotonic() - inicio
+            self._checkouts += 1
+            self._espera_total += espera
+            self._espera_max = max(self._espera_max, espera)
+
+        try:
+            if conexao is None:
+                conexao = self._criar()
+            elif time.monotonic() - devolvida_em > self.verificar_apos and not self._saudavel(conexao):
+                self._fechar(conexao)
+                with self._cond:
+                    self._descartadas += 1
+                conexao = self._criar()
+        except Exception:
+            with self._cond:
+                self._abertas -= 1
+                self._em_uso -= 1
+                self._cond.notify()
+            raise
+        return conexao
+
+    # Devolve a conexão ao pool (ou a fecha, se estiver em estado desconhecido)
+    def devolver(self, conexao, descartar=False):
+        if descartar:
+            self._fechar(conexao)
+        with self._cond:
+            self._em_uso -= 1
+            if descartar:
+                self._abertas -= 1
+                self._descartadas += 1
+            else:
+                self._livres.append((conexao, time.monotonic()))
+            self._cond.notify()
+
+    def metricas(self):
+        with self._cond:
+            return {
+                'tamanho': self.tamanho,
+                'abertas': self._abertas,
+                'em_uso': self._em_uso,
+                'livres': len(self._livres),
+                'checkouts': self._checkouts,
+                'espera_media_ms': round(self._espera_total / self._checkouts * 1000, 3) if self._checkouts else 0,
+                'espera_max_ms': round(self._espera_max * 1000, 3),
+                'esgotamentos': self._esgotamentos,
+                'descartadas': self._descartadas,
+            }
+
+    @staticmethod
+    def _saudavel(conexao):
+        try:
+            conexao.ping()
+            return True
+        except MySQLdb.Error:
+            return False
+
+    @staticmethod
+    def _fechar(conexao):
+        try:
+            conexao.close()
+        except MySQLdb.Error:
+            pass
+
+
+# Cursor que cronometra cada comando e avisa os observadores com (sql, params, duração)
+class CursorMedido:
+    def __init__(self, cursor, observadores):
+        self._cursor = cursor
+        self._observadores = observadores
+
+    def _medir(self, metodo, sql, params):
+        inicio = time.perf_counter()
+        try:
+            return metodo(sql, params)
+        finally:
+            duracao = time.perf_counter() - inicio
+            for observador in self._observadores:
+                observador(sql, params, duracao)
+
+    def execute(self, sql, params=None):
+        return self._medir(self._cursor.execute, sql, params)
+
+    def executemany(self, sql, params):
+        return self._medir(self._cursor.executemany, sql, params)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+
+# Extensão Flask: uma conexão do pool por contexto de aplicação, devolvida no teardown
+class BancoDados:
+    def __init__(self, app=None):
+        self.pool = None
+        # Funções (sql, params, duração) chamadas após cada comando (ex.: instrumentacao)
+        self.observadores = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('MYSQL_HOST', 'localhost')
+        app.config.setdefault('MYSQL_PORT', 3306)
+        app.config.setdefault('MYSQL_CHARSET', 'utf8mb4')
+        app.config.setdefault('MYSQL_CURSORCLASS', 'DictCursor')
+        app.config.setdefault('MYSQL_POOL_TAMANHO', 10)
+        app.config.setdefault('MYSQL_POOL_ESPERA', 5.0)
+        app.config.setdefault('MYSQL_POOL_VERIFICAR_APOS', 30.0)
+
+        def criar():
+            return MySQLdb.connect(
+                host=app.config['MYSQL_HOST'], port=app.config['MYSQL_PORT'],
+                user=app.config['MYSQL_USER'], passwd=app.config['MYSQL_PASSWORD'],
+                db=app.config['MYSQL_DB'], charset=app.config['MYSQL_CHARSET'],
+                cursorclass=getattr(MySQLdb.cursors, app.config['MYSQL_CURSORCLASS']),
+            )
+
+        self.pool = PoolConexoes(criar, app.config['MYSQL_POOL_TAMANHO'], app.config['MYSQL_POOL_ESPERA'],
+                                 app.config['MYSQL_POOL_VERIFICAR_APOS'])
+        app.teardown_appcontext(self._devolver)
+
+    # Conexão do contexto atual (retirada do pool no primeiro uso)
+    @property
+    def connection(self):
+        if 'mysql_conexao' not in g:
+            g.mysql_conexao = self.pool.obter()
+        return g.mysql_conexao
+
+    def _devolver(self, exc):
+        conexao = g.pop('mysql_conexao', None)
+        if conexao is None:
+            return
+        try:
+            conexao.rollback()
+        except MySQLdb.Error:
+            self.pool.devolver(conexao, descartar=True)
+        else:
+            self.pool.devolver(conexao)
+
+    # Cursor que é sempre fechado ao sair do bloco (somente leitura ou commit manual).
+    # servidor=True usa um cursor do lado do servidor, que lê as linhas sob demanda.
+    @contextmanager
+    def cursor(self, servidor=False):
+        cur = self.connection.cursor(MySQLdb.cursors.SSDictCursor) if servidor else self.connection.cursor()
+        try:
+            yield CursorMedido(cur, self.observadores) if self.observadores else cur
+        finally:
+            cur.close()
+
+    # Cursor numa transação: commit ao sair do bloco, rollback se houver exceção
+    @contextmanager
+    def transacao(self):
+        with self.cursor() as cur:
+            try:
+                yield cur
+            except BaseException:
+                self.connection.rollback()
+                raise
+            self.connection.commit()
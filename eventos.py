@@ -0,0 +1,105 @@
+# Eventos ao vivo do painel (novos agendamentos, cancelamentos, conclusões, configurações).
+# Broker em memória com threads: publicar só copia o evento para a fila limitada de cada assinante (sem
+# esperar ninguém, um painel lento perde os eventos mais antigos), e cada view SSE espera na sua fila.
+# Limites deste desenho:
+# - o broker é do processo: um painel só recebe os eventos publicados pelo worker em que está conectado
+#   (e nenhum do worker de tarefas separado). O painel ao vivo pede um único worker web, com
+#   TAREFAS_EM_PROCESSO=True se os eventos das tarefas também devem chegar;
+# - cada painel aberto prende uma thread do servidor durante toda a conexão (a view SSE é síncrona,
+#   ver administracao.admin_eventos): o worker precisa de threads para os painéis abertos mais as
+#   requisições normais (ex.: gunicorn --worker-class gthread --threads 16 --workers 1). Por isso o broker
+#   aceita no máximo EVENTOS_MAXIMO_PAINEIS assinaturas; além disso assinar levanta PainelLotado (503),
+#   para os painéis não tomarem todas as threads do worker.
+from collections import deque
+import itertools
+import json
+import queue
+import threading
+
+
+# Painéis abertos demais neste processo
+class PainelLotado(Exception):
+    pass
+
+
+# Assinante (view SSE): fila limitada; se o cliente ficar para trás, descarta os mais antigos
+class Assinatura:
+    def __init__(self, broker, tamanho):
+        self._broker = broker
+        self._fila = queue.Queue(tamanho)
+
+    def entregar(self, evento):
+        while True:
+            try:
+                self._fila.put_nowait(evento)
+                return
+            except queue.Full:
+                try:
+                    self._fila.get_nowait()
+                except queue.Empty:
+                    pass
+
+    # Próximo evento, ou None se nada chegar em `timeout` segundos (hora de mandar um keepalive)
+    def proximo(self, timeout=15.0):
+        try:
+            return self._fila.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def cancelar(self):
+        self._broker._remover(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cancelar()
+
+
+class Broker:
+    def __init__(self, tamanho_fila=100, historico=100, maximo_assinantes=8, app=None):
+        self.tamanho_fila = tamanho_fila
+        self.maximo_assinantes = maximo_assinantes
+        self._assinantes = set()
+        self._recentes = deque(maxlen=historico)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.maximo_assinantes = app.config['EVENTOS_MAXIMO_PAINEIS']
+
+    # Publica um evento {'id', 'tipo', 'dados'} para todos os assinantes; a entrega nunca bloqueia
+    def publicar(self, tipo, dados):
+        with self._lock:
+            evento = {'id': next(self._ids), 'tipo': tipo, 'dados': dados}
+            self._recentes.append(evento)
+            assinantes = list(self._assinantes)
+        for assinante in assinantes:
+            assinante.entregar(evento)
+        return evento
+
+    # Nova assinatura; `desde` reenvia os eventos recentes com id maior (reconexão com Last-Event-ID).
+    # Levanta PainelLotado se já há maximo_assinantes painéis conectados a este processo.
+    def assinar(self, desde=None):
+        return self._registrar(Assinatura(self, self.tamanho_fila), desde)
+
+    def _registrar(self, assinatura, desde):
+        with self._lock:
+            if len(self._assinantes) >= self.maximo_assinantes:
+                raise PainelLotado(f'{self.maximo_assinantes} painéis ao vivo já conectados; tente de novo mais tarde.')
+            self._assinantes.add(assinatura)
+            perdidos = [e for e in self._recentes if desde is not None and e['id'] > desde]
+        for evento in perdidos:
+            assinatura.entregar(evento)
+        return assinatura
+
+    def _remover(self, assinatura):
+        with self._lock:
+            self._assinantes.discard(assinatura)
+
+
+# Evento no formato text/event-stream
+def formatar_sse(evento):
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {json.dumps(evento['dados'], default=str)}\n\n"
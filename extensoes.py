@@ -0,0 +1,89 @@
+# Extensões e estado compartilhados pelos blueprints, criados sem app: create_app (app.py) liga cada um
+# à aplicação com init_app. Nada conecta ao MySQL nem sobe pool de processos ou threads na importação;
+# conexões e o pool do bcrypt são criados no primeiro uso.
+from flask_login import LoginManager, UserMixin
+
+from cache import CacheLRU
+from cache_http import CacheRespostas
+from db import BancoDados
+import eventos
+from instrumentacao import Instrumentacao
+from limites import ControleAdmissao
+from senhas import ServicoSenhas
+import tarefas
+
+mysql = BancoDados()
+instrumentacao = Instrumentacao()
+admissao = ControleAdmissao()
+senhas = ServicoSenhas()
+login_manager = LoginManager()
+login_manager.login_view = 'autenticacao.login'
+broker = eventos.Broker()
+cache_usuarios = CacheLRU()
+cache_visitas = CacheLRU()
+cache_respostas = CacheRespostas(mysql)
+
+# Modelo de Usuário
+class Usuario(UserMixin):
+    def __init__(self, id, nome, email, is_admin):
+        self.id = id
+        self.nome = nome
+        self.email = email
+        self.is_admin = is_admin
+
+    def get_id(self):
+        return str(self.id)
+
+@login_manager.user_loader
+def load_user(user_id):
+    dados = cache_usuarios.obter(str(user_id))
+    if dados is None:
+        with mysql.cursor() as cur:
+            cur.execute("SELECT id, nome, email, is_admin FROM usuarios WHERE id = %s", (user_id,))
+            user = cur.fetchone()
+        if not user:
+            return None
+        dados = (user['id'], user['nome'], user['email'], user['is_admin'])
+        cache_usuarios.guardar(str(user_id), dados)
+    return Usuario(*dados)
+
+# Descartar o usuário do cache sempre que seus dados mudarem (cadastro, logout). O cache é de cada processo:
+# com vários workers, a invalidação só vale neste; nos outros a entrada antiga expira por USUARIOS_CACHE_TTL
+def invalidar_usuario(user_id):
+    cache_usuarios.invalidar(str(user_id))
+
+# Visitas (cortes realizados) do cliente, com cache; invalidar quando um agendamento dele muda de/para concluído
+def visitas_do_cliente(cur, user_id):
+    visitas = cache_visitas.obter(str(user_id))
+    if visitas is None:
+        import cliente
+        visitas = cliente.contar_visitas(cur, user_id)
+        cache_visitas.guardar(str(user_id), visitas)
+    return visitas
+
+def invalidar_visitas(user_id):
+    cache_visitas.invalidar(str(user_id))
+
+# Depois do commit de uma tarefa em segundo plano: avisa o painel ao vivo
+def tarefa_concluida(nome, resultado):
+    if nome == 'arquivar_concluidos' and resultado['ids']:
+        broker.publicar('cortes_arquivados', {'data': resultado['data'], 'total': len(resultado['ids'])})
+    elif nome == 'marcar_faltas' and resultado['ids']:
+        broker.publicar('agendamentos_atualizados', {'status': 'Cancelado', 'ids': resultado['ids'],
+                                                     'motivo': tarefas.MOTIVO_FALTA})
+
+agendador = tarefas.Agendador(banco=mysql, ao_concluir=tarefa_concluida)
+
+# Liga todas as extensões à aplicação (os caches de usuários e visitas seguem a configuração)
+def init_app(app):
+    mysql.init_app(app)
+    instrumentacao.init_app(app, mysql)
+    admissao.init_app(app)
+    senhas.init_app(app)
+    login_manager.init_app(app)
+    cache_respostas.init_app(app)
+    broker.init_app(app)
+    cache_usuarios.tamanho = cache_visitas.tamanho = app.config['USUARIOS_CACHE_TAMANHO']
+    cache_usuarios.ttl = app.config['USUARIOS_CACHE_TTL']
+    cache_visitas.ttl = app.config['VISITAS_CACHE_TTL']
+    agendador.init_app(app)
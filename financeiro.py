@@ -0,0 +1,65 @@
+# Planilha financeira do painel (tabela financeiro): 12 meses por ano, gravados com um único upsert
+# e lidos de uma série anual em cache, invalidada pela versão da tabela
+import threading
+
+from versoes import incrementar_versao, versao_atual
+
+MESES = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+
+# Uma linha por (ano, mes): recria a tabela com a chave única, descartando duplicatas antigas
+MIGRACAO_ANO_MES_UNICO = [
+    "CREATE TABLE financeiro_novo LIKE financeiro",
+    "ALTER TABLE financeiro_novo ADD UNIQUE KEY uq_financeiro_ano_mes (ano, mes)",
+    "INSERT IGNORE INTO financeiro_novo SELECT * FROM financeiro",
+    "RENAME TABLE financeiro TO financeiro_antigo, financeiro_novo TO financeiro",
+    "DROP TABLE financeiro_antigo",
+]
+
+_UPSERT = """
+    INSERT INTO financeiro (ano, mes, receita, despesa)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE receita = VALUES(receita), despesa = VALUES(despesa)
+"""
+
+_lock = threading.Lock()
+_cache = {'versao': None, 'series': {}}
+
+
+def invalidar():
+    with _lock:
+        _cache['versao'] = None
+        _cache['series'] = {}
+
+
+# Receitas e despesas (negativas, como nos gráficos) dos 12 meses do ano; meses sem linha valem 0
+def serie_anual(cur, ano):
+    versao = versao_atual(cur, 'financeiro')
+    with _lock:
+        if versao == _cache['versao'] and ano in _cache['series']:
+            return _cache['series'][ano]
+    cur.execute("SELECT mes, receita, despesa FROM financeiro WHERE ano = %s", (ano,))
+    receitas = [0] * len(MESES)
+    despesas = [0] * len(MESES)
+    for linha in cur.fetchall():
+        if linha['mes'] in MESES:
+            indice = MESES.index(linha['mes'])
+            receitas[indice] = linha['receita']
+            despesas[indice] = -linha['despesa']
+    serie = {'meses': MESES, 'receitas': receitas, 'despesas': despesas}
+    with _lock:
+        if versao != _cache['versao']:
+            _cache['versao'] = versao
+            _cache['series'] = {}
+        _cache['series'][ano] = serie
+    return serie
+
+
+# Grava os meses informados ({mes: (receita, despesa)}) num único INSERT de várias linhas
+# (o executemany do MySQLdb junta os VALUES) e marca a tabela como alterada.
+# O chamador faz o commit; chame invalidar() depois dele.
+def salvar(cur, ano, valores):
+    linhas = [(ano, mes, receita, despesa) for mes, (receita, despesa) in valores.items() if mes in MESES]
+    if linhas:
+        cur.executemany(_UPSERT, linhas)
+        incrementar_versao(cur, 'financeiro')
+    return len(linhas)
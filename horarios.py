@@ -0,0 +1,94 @@
+# Cache das configurações semanais e das grades de horários de agendamento
+import threading
+
+import agenda
+from versoes import versao_atual
+
+DIAS_SEMANA = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+
+_lock = threading.Lock()
+_cache = {'versao': None, 'configuracoes': [], 'grades': {}}
+
+
+# Função para converter timedelta (coluna TIME) para string no formato HH:MM
+def timedelta_to_str(td):
+    return agenda.formatar(agenda.minutos(td))
+
+
+# Horários de início entre abertura (inclusive) e fechamento (exclusive), a cada `intervalo` minutos
+def gerar_grade(hora_abertura, hora_fechamento, intervalo):
+    return tuple(agenda.formatar(minuto) for minuto in
+                 agenda.grade(agenda.minutos(hora_abertura), agenda.minutos(hora_fechamento), intervalo))
+
+
+# Descarta o cache deste processo (os demais percebem pela versão no banco)
+def invalidar():
+    with _lock:
+        _cache['versao'] = None
+        _cache['configuracoes'] = []
+        _cache['grades'] = {}
+
+
+def _carregar(cur):
+    versao = versao_atual(cur, 'configuracoes')
+    if versao == _cache['versao']:
+        return _cache
+    cur.execute("SELECT * FROM configuracoes ORDER BY FIELD(dia_semana, 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo')")
+    configuracoes = cur.fetchall()
+    for config in configuracoes:
+        config['hora_abertura'] = timedelta_to_str(config['hora_abertura'])
+        config['hora_fechamento'] = timedelta_to_str(config['hora_fechamento'])
+    with _lock:
+        _cache['versao'] = versao
+        _cache['configuracoes'] = configuracoes
+        _cache['grades'] = {}
+    return _cache
+
+
+# Configurações da semana (Segunda a Domingo) com horários já em HH:MM
+def configuracoes_semana(cur):
+    return [dict(config) for config in _carregar(cur)['configuracoes']]
+
+
+def _config_do_dia(cache, dia_semana):
+    nome = DIAS_SEMANA[dia_semana]
+    config = next((c for c in cache['configuracoes'] if c['dia_semana'] == nome), None)
+    if not config or config['fechado'] or not config['hora_abertura'] or not config['hora_fechamento']:
+        return None
+    return config
+
+
+# Abertura e fechamento (em minutos) de um dia da semana, ou None se a barbearia não abre
+def expediente(cur, dia_semana):
+    config = _config_do_dia(_carregar(cur), dia_semana)
+    if config is None:
+        return None
+    return agenda.minutos(config['hora_abertura']), agenda.minutos(config['hora_fechamento'])
+
+
+# Grade de horários de um dia da semana (0 = segunda) e o intervalo usado.
+# Levanta ValueError se os horários configurados estiverem em formato inválido.
+def grade_do_dia(cur, dia_semana):
+    cache = _carregar(cur)
+    config = _config_do_dia(cache, dia_semana)
+    if config is None:
+        return (), 30
+    intervalo = config['intervalo_agendamento']
+    if intervalo <= 0:
+        intervalo = 30
+    chave = (dia_semana, intervalo)
+    grade = cache['grades'].get(chave)
+    if grade is None:
+        grade = gerar_grade(config['hora_abertura'], config['hora_fechamento'], intervalo)
+        with _lock:
+            cache['grades'][chave] = grade
+    return grade, intervalo
+
+
+# Disponibilidade de um dia como bitmap em hexadecimal: bit i ligado = i-ésimo horário da grade livre
+def codificar_disponibilidade(grade, ocupados):
+    bits = 0
+    for i, horario in enumerate(grade):
+        if horario not in ocupados:
+            bits |= 1 << i
+    return format(bits, 'x')
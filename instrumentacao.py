@@ -0,0 +1,117 @@
+# Métricas por endpoint: tempo total, tempo no banco e número de comandos SQL de cada requisição.
+# Histogramas em memória, exportados no formato texto do Prometheus; requisições lentas vão para o log
+# com o SQL e os parâmetros de cada comando.
+import bisect
+import logging
+import threading
+import time
+
+from flask import g, has_request_context, request
+
+log_lento = logging.getLogger('barbearia.lento')
+
+# Limites (le) dos histogramas
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_COMANDOS = (1, 2, 5, 10, 20, 50, 100)
+
+# Comandos guardados por requisição para o log de lentidão
+MAXIMO_COMANDOS_LOG = 50
+
+
+class Histograma:
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma = 0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    # Pares (le, contagem acumulada), terminando em +Inf
+    def acumulado(self):
+        acumulado = 0
+        for limite, contagem in zip(self.limites + ('+Inf',), self.contagens):
+            acumulado += contagem
+            yield limite, acumulado
+
+
+_SERIES = [
+    ('http_requisicao_duracao_segundos', 'Tempo total da requisição por endpoint.', LIMITES_SEGUNDOS),
+    ('http_requisicao_banco_segundos', 'Tempo gasto em comandos SQL por requisição.', LIMITES_SEGUNDOS),
+    ('http_requisicao_comandos_sql', 'Comandos SQL executados por requisição.', LIMITES_COMANDOS),
+]
+
+
+# Extensão Flask: mede cada requisição e observa os cursores do BancoDados
+class Instrumentacao:
+    def __init__(self, app=None, banco=None):
+        self._lock = threading.Lock()
+        self._histogramas = {}
+        if app is not None:
+            self.init_app(app, banco)
+
+    def init_app(self, app, banco):
+        app.config.setdefault('METRICAS_LIMITE_LENTO', 0.5)
+        app.config.setdefault('METRICAS_CABECALHO', False)
+        self.limite_lento = app.config['METRICAS_LIMITE_LENTO']
+        self.cabecalho = app.config['METRICAS_CABECALHO']
+        if self._observar_comando not in banco.observadores:
+            banco.observadores.append(self._observar_comando)
+        app.before_request(self._iniciar)
+        app.after_request(self._finalizar)
+
+    def _iniciar(self):
+        g.metricas_inicio = time.perf_counter()
+        g.metricas_banco = 0.0
+        g.metricas_comandos = 0
+        g.metricas_sql = []
+
+    def _observar_comando(self, sql, params, duracao):
+        if not has_request_context() or 'metricas_inicio' not in g:
+            return
+        g.metricas_banco += duracao
+        g.metricas_comandos += 1
+        if len(g.metricas_sql) < MAXIMO_COMANDOS_LOG:
+            g.metricas_sql.append((sql, params, duracao))
+
+    def _finalizar(self, resposta):
+        if 'metricas_inicio' not in g:
+            return resposta
+        duracao = time.perf_counter() - g.metricas_inicio
+        endpoint = request.endpoint or 'desconhecido'
+        with self._lock:
+            series = self._histogramas.get(endpoint)
+            if series is None:
+                series = self._histogramas[endpoint] = [Histograma(limites) for _, _, limites in _SERIES]
+            for histograma, valor in zip(series, (duracao, g.metricas_banco, g.metricas_comandos)):
+                histograma.observar(valor)
+
+        if self.cabecalho:
+            resposta.headers['Server-Timing'] = f'db;dur={g.metricas_banco * 1000:.1f}, total;dur={duracao * 1000:.1f}'
+            resposta.headers['X-Comandos-SQL'] = str(g.metricas_comandos)
+        if duracao >= self.limite_lento:
+            comandos = '\n'.join(f'  [{d * 1000:.1f} ms] {" ".join(sql.split())} -- {params!r}'
+                                 for sql, params, d in g.metricas_sql)
+            log_lento.warning('%s %s (%s): %.1f ms, banco %.1f ms, %d comando(s)\n%s', request.method, request.path,
+                              endpoint, duracao * 1000, g.metricas_banco * 1000, g.metricas_comandos, comandos)
+        return resposta
+
+    # Todas as séries no formato texto do Prometheus (text/plain; version=0.0.4)
+    def exportar(self):
+        with self._lock:
+            copia = {endpoint: [(list(h.acumulado()), h.soma, h.total) for h in series]
+                     for endpoint, series in sorted(self._histogramas.items())}
+        linhas = []
+        for i, (nome, ajuda, _) in enumerate(_SERIES):
+            linhas.append(f'# HELP {nome} {ajuda}')
+            linhas.append(f'# TYPE {nome} histogram')
+            for endpoint, series in copia.items():
+                acumulado, soma, total = series[i]
+                for limite, contagem in acumulado:
+                    linhas.append(f'{nome}_bucket{{endpoint="{endpoint}",le="{limite}"}} {contagem}')
+                linhas.append(f'{nome}_sum{{endpoint="{endpoint}"}} {soma}')
+                linhas.append(f'{nome}_count{{endpoint="{endpoint}"}} {total}')
+        return '\n'.join(linhas) + '\n'
@@ -0,0 +1,170 @@
+# Controle de admissão: baldes de fichas (token bucket) por rota, por usuário autenticado ou, sem login,
+# por IP, e um teto global de requisições simultâneas, abaixo do tamanho do pool do MySQL, para recusar
+# carga (429/503) antes de as requisições ficarem esperando conexão.
+# Os baldes ficam em memória (por processo) ou num armazenamento compartilhado entre os workers (Redis).
+from collections import OrderedDict
+import math
+import threading
+import time
+
+from flask import g, request
+from flask_login import current_user
+
+
+class LimiteExcedido(Exception):
+    def __init__(self, espera):
+        super().__init__(f'Limite de requisições excedido; tente de novo em {espera:.0f}s.')
+        self.espera = espera
+
+
+class Sobrecarregado(Exception):
+    pass
+
+
+# Baldes de um processo só: chaves menos usadas são descartadas acima de `maximo_chaves`
+class BaldesMemoria:
+    def __init__(self, maximo_chaves=100000):
+        self.maximo_chaves = maximo_chaves
+        self._baldes = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Tira `custo` fichas do balde (capacidade, reposição em fichas/s); devolve (permitido, espera em segundos)
+    def consumir(self, chave, capacidade, taxa, custo=1):
+        agora = time.monotonic()
+        with self._lock:
+            fichas, atualizado = self._baldes.pop(chave, (capacidade, agora))
+            fichas = min(capacidade, fichas + (agora - atualizado) * taxa)
+            permitido = fichas >= custo
+            if permitido:
+                fichas -= custo
+            self._baldes[chave] = (fichas, agora)
+            while len(self._baldes) > self.maximo_chaves:
+                self._baldes.popitem(last=False)
+        return permitido, 0.0 if permitido else (custo - fichas) / taxa
+
+
+# O mesmo balde num servidor Redis compartilhado pelos workers: o script roda atômico no servidor,
+# com o relógio do servidor, e a chave expira quando o balde enche de novo
+_SCRIPT_REDIS = """
+local capacidade, taxa, custo = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local relogio = redis.call('TIME')
+local agora = tonumber(relogio[1]) + tonumber(relogio[2]) / 1000000
+local balde = redis.call('HMGET', KEYS[1], 'fichas', 'atualizado')
+local fichas = tonumber(balde[1]) or capacidade
+local atualizado = tonumber(balde[2]) or agora
+fichas = math.min(capacidade, fichas + math.max(0, agora - atualizado) * taxa)
+local permitido = 0
+if fichas >= custo then
+    fichas = fichas - custo
+    permitido = 1
+end
+redis.call('HSET', KEYS[1], 'fichas', tostring(fichas), 'atualizado', tostring(agora))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacidade / taxa) + 1)
+return {permitido, tostring(fichas)}
+"""
+
+
+class BaldesRedis:
+    def __init__(self, cliente, prefixo='limites:'):
+        self._script = cliente.register_script(_SCRIPT_REDIS)
+        self.prefixo = prefixo
+
+    @classmethod
+    def da_url(cls, url):
+        import redis
+        return cls(redis.Redis.from_url(url))
+
+    def consumir(self, chave, capacidade, taxa, custo=1):
+        permitido, fichas = self._script(keys=[self.prefixo + chave], args=[capacidade, taxa, custo])
+        fichas = float(fichas)
+        return bool(permitido), 0.0 if permitido else (custo - fichas) / taxa
+
+
+# Extensão Flask: antes de cada requisição confere o teto de simultâneas e o orçamento da rota.
+# Orçamentos em LIMITES_ROTAS: {'endpoint' ou 'MÉTODO endpoint': (capacidade, fichas por segundo)}.
+class ControleAdmissao:
+    def __init__(self, app=None, armazenamento=None):
+        self.armazenamento = armazenamento
+        self._lock = threading.Lock()
+        self._em_andamento = 0
+        self._recusas = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('LIMITES_ROTAS', {})
+        app.config.setdefault('LIMITES_ARMAZENAMENTO', None)
+        app.config.setdefault('ADMISSAO_MAXIMO_SIMULTANEAS', app.config.get('MYSQL_POOL_TAMANHO', 10))
+        app.config.setdefault('ADMISSAO_ISENTOS', ('static',))
+        self.rotas = app.config['LIMITES_ROTAS']
+        self.maximo = app.config['ADMISSAO_MAXIMO_SIMULTANEAS']
+        self.isentos = set(app.config['ADMISSAO_ISENTOS'])
+        if self.armazenamento is None:
+            url = app.config['LIMITES_ARMAZENAMENTO']
+            self.armazenamento = BaldesRedis.da_url(url) if url else BaldesMemoria()
+        app.before_request(self._admitir)
+        app.teardown_request(self._liberar)
+
+    def _recusar(self, motivo, endpoint):
+        with self._lock:
+            self._recusas[(motivo, endpoint)] = self._recusas.get((motivo, endpoint), 0) + 1
+
+    def _orcamento(self, endpoint):
+        return self.rotas.get(f'{request.method} {endpoint}') or self.rotas.get(endpoint)
+
+    # O teto de simultâneas vem primeiro: resolver current_user (sessão e, sem cache, uma consulta ao MySQL)
+    # para o orçamento já seria trabalho que a sobrecarga deve recusar. A vaga é devolvida em _liberar,
+    # que roda mesmo quando o orçamento recusa a requisição.
+    def _admitir(self):
+        endpoint = request.endpoint
+        if endpoint is None or endpoint in self.isentos:
+            return
+        with self._lock:
+            if self._em_andamento >= self.maximo:
+                lotado = True
+            else:
+                lotado = False
+                self._em_andamento += 1
+        if lotado:
+            self._recusar('sobrecarga', endpoint)
+            raise Sobrecarregado(f'{self.maximo} requisições simultâneas em andamento.')
+        g.admissao_vaga = True
+        orcamento = self._orcamento(endpoint)
+        if orcamento:
+            dono = f'u:{current_user.get_id()}' if current_user.is_authenticated else f'ip:{request.remote_addr}'
+            permitido, espera = self.armazenamento.consumir(f'{endpoint}:{dono}', *orcamento)
+            if not permitido:
+                self._recusar('limite', endpoint)
+                raise LimiteExcedido(espera)
+
+    def _liberar(self, exc):
+        if g.pop('admissao_vaga', False):
+            with self._lock:
+                self._em_andamento -= 1
+
+    def metricas(self):
+        with self._lock:
+            recusas = {}
+            for (motivo, endpoint), total in sorted(self._recusas.items()):
+                recusas.setdefault(motivo, {})[endpoint] = total
+            return {'em_andamento': self._em_andamento, 'maximo': self.maximo,
+                    'armazenamento': type(self.armazenamento).__name__, 'recusas': recusas}
+
+    # Recusas por motivo e endpoint e requisições em andamento, no formato texto do Prometheus
+    def exportar(self):
+        with self._lock:
+            recusas = sorted(self._recusas.items())
+            em_andamento = self._em_andamento
+        linhas = ['# HELP http_requisicoes_recusadas_total Requisições recusadas pelo controle de admissão.',
+                  '# TYPE http_requisicoes_recusadas_total counter']
+        linhas += [f'http_requisicoes_recusadas_total{{motivo="{motivo}",endpoint="{endpoint}"}} {total}'
+                   for (motivo, endpoint), total in recusas]
+        linhas += ['# HELP http_requisicoes_em_andamento Requisições admitidas ainda em andamento.',
+                   '# TYPE http_requisicoes_em_andamento gauge',
+                   f'http_requisicoes_em_andamento {em_andamento}']
+        return '\n'.join(linhas) + '\n'
+
+
+# Segundos inteiros para o cabeçalho Retry-After (no mínimo 1)
+def retry_after(espera):
+    return str(max(1, math.ceil(espera)))
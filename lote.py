@@ -0,0 +1,76 @@
+# Mudanças de status em lote (concluir/cancelar vários agendamentos, arquivar por filtro)
+import resumo
+import versoes
+
+# Status de destino -> status de origem permitidos
+TRANSICOES = {
+    'Concluído': ('Ativo',),
+    'Cancelado': ('Ativo',),
+    'Arquivado': ('Concluído',),
+}
+
+MAXIMO_IDS = 500
+
+
+def _marcadores(valores):
+    return ', '.join(['%s'] * len(valores))
+
+
+# Aplica status_novo aos ids numa única transação (a do cursor).
+# Devolve ({id: 'ok' | 'nao_encontrado' | 'status_invalido'}, agendamentos alterados).
+def atualizar_status(cur, ids, status_novo, motivo=None):
+    origens = TRANSICOES[status_novo]
+    ids = list(dict.fromkeys(int(i) for i in ids))
+    if not ids:
+        return {}, []
+    cur.execute(f"SELECT * FROM agendamentos WHERE id IN ({_marcadores(ids)}) FOR UPDATE", ids)
+    encontrados = {agendamento['id']: agendamento for agendamento in cur.fetchall()}
+    alterados = [a for a in encontrados.values() if a['status'] in origens]
+
+    if alterados:
+        ids_alterados = [a['id'] for a in alterados]
+        campos = "status = %s"
+        params = [status_novo]
+        if status_novo == 'Cancelado':
+            campos += ", motivo_cancelamento = %s"
+            params.append(motivo)
+        cur.execute(
+            f"UPDATE agendamentos SET {campos} WHERE id IN ({_marcadores(ids_alterados)}) AND status IN ({_marcadores(origens)})",
+            params + ids_alterados + list(origens)
+        )
+        resumo.registrar_transicao(cur, alterados, status_novo)
+        versoes.incrementar_versao(cur, 'agendamentos')
+
+    ids_alterados = {a['id'] for a in alterados}
+    resultados = {
+        i: 'ok' if i in ids_alterados else ('status_invalido' if i in encontrados else 'nao_encontrado')
+        for i in ids
+    }
+    return resultados, alterados
+
+
+# Arquiva os concluídos que atendem aos filtros (data_inicio/data_fim inclusivos, servico).
+# Sem nenhuma das datas arquivaria todos os concluídos: exige todos=True para isso, senão levanta ValueError.
+# Devolve os agendamentos arquivados.
+def arquivar(cur, data_inicio=None, data_fim=None, servico=None, todos=False):
+    if not data_inicio and not data_fim and not todos:
+        raise ValueError('Informe o período (data_inicio e/ou data_fim) ou todos = true.')
+    condicoes = ["status = 'Concluído'"]
+    params = []
+    if data_inicio:
+        condicoes.append("data >= %s")
+        params.append(data_inicio)
+    if data_fim:
+        condicoes.append("data <= %s")
+        params.append(data_fim)
+    if servico:
+        condicoes.append("servico = %s")
+        params.append(servico)
+    where = ' AND '.join(condicoes)
+    cur.execute(f"SELECT id, data, horario, servico, status, preco FROM agendamentos WHERE {where} FOR UPDATE", params)
+    concluidos = cur.fetchall()
+    if concluidos:
+        cur.execute(f"UPDATE agendamentos SET status = 'Arquivado' WHERE {where}", params)
+        resumo.registrar_transicao(cur, concluidos, 'Arquivado')
+        versoes.incrementar_versao(cur, 'agendamentos')
+    return concluidos
@@ -0,0 +1,153 @@
+# Migrações de esquema do banco, aplicadas em ordem e registradas em schema_migracoes.
+# Cada comando é um SQL ou uma função que recebe o cursor (ex.: backfill do resumo).
+# Migração publicada não muda mais: bancos que já a aplicaram nunca a rodam de novo. Ela não pode depender
+# de código que evolui (as reconstruções do resumo de 004 e 005 estão copiadas abaixo como eram na época),
+# e as constantes que as migrações referenciam só recebem acréscimos em migrações novas.
+import agenda
+import arquivo
+import cliente
+import dashboard
+import financeiro
+import recursos
+import reservas
+import resumo
+import servicos
+import tarefas
+import transacoes
+import versoes
+
+# 003 como publicada (era horarios.ESQUEMA_VERSOES)
+_VERSOES_TABELAS_003 = """
+    CREATE TABLE IF NOT EXISTS versoes_tabelas (
+        tabela VARCHAR(64) PRIMARY KEY,
+        versao BIGINT NOT NULL DEFAULT 0
+    )
+"""
+
+_AJUSTE_RESUMO = """
+    INSERT INTO agendamentos_resumo (data, servico, hora, status, total, receita)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE total = total + VALUES(total), receita = receita + VALUES(receita)
+"""
+
+# Preços fixos usados pelo resumo antes do catálogo de serviços (005)
+_PRECOS_004 = {'Corte Clássico': 40.00, 'Corte Degradê': 45.00, 'Barba Completa': 30.00, 'Corte + Barba': 65.00,
+               'Sobrancelha': 20.00}
+
+
+# resumo.reconstruir da 004: contagem de agendamentos com a receita pelos preços fixos
+def _reconstruir_resumo_004(cur):
+    cur.execute(resumo.ESQUEMA)
+    cur.execute("DELETE FROM agendamentos_resumo")
+    cur.execute("""
+        SELECT data, servico, SUBSTRING(horario, 1, 2) AS hora, status, COUNT(*) AS total
+        FROM agendamentos
+        GROUP BY data, servico, hora, status
+    """)
+    linhas = [(str(l['data']), l['servico'], l['hora'], l['status'], l['total'], _PRECOS_004.get(l['servico'], 0) * l['total'])
+              for l in cur.fetchall() if l['total']]
+    if linhas:
+        cur.executemany(_AJUSTE_RESUMO, linhas)
+
+
+# resumo.reconstruir da 005: receita pelo preço gravado em cada agendamento (ainda sem o arquivo frio)
+def _reconstruir_resumo_005(cur):
+    cur.execute(resumo.ESQUEMA)
+    cur.execute("DELETE FROM agendamentos_resumo")
+    cur.execute("""
+        SELECT data, servico, SUBSTRING(horario, 1, 2) AS hora, status, COUNT(*) AS total, SUM(preco) AS receita
+        FROM agendamentos
+        GROUP BY data, servico, hora, status
+    """)
+    linhas = [(str(l['data']), l['servico'], l['hora'], l['status'], l['total'], l['receita'] or 0)
+              for l in cur.fetchall() if l['total'] or l['receita']]
+    if linhas:
+        cur.executemany(_AJUSTE_RESUMO, linhas)
+
+
+MIGRACOES = [
+    ('001_resumo_agendamentos', [resumo.ESQUEMA]),
+    ('002_indices_agendamentos', [
+        # Disponibilidade do dia, painel de hoje, cancelamentos do mês
+        "CREATE INDEX idx_agendamentos_data_status_horario ON agendamentos (data, status, horario)",
+        # Painel do cliente
+        "CREATE INDEX idx_agendamentos_usuario_data_horario ON agendamentos (usuario_id, data, horario)",
+        # Últimos concluídos/arquivados (transações e histórico)
+        "CREATE INDEX idx_agendamentos_status_data_horario ON agendamentos (status, data, horario)",
+    ]),
+    ('003_versoes_tabelas', [_VERSOES_TABELAS_003]),
+    ('004_slot_ativo_unico', reservas.MIGRACAO_SLOT_UNICO + [_reconstruir_resumo_004]),
+    ('005_catalogo_servicos', servicos.MIGRACAO_CATALOGO + [_reconstruir_resumo_005]),
+    ('006_arquivo_agendamentos', [arquivo.ESQUEMA]),
+    ('007_financeiro_ano_mes_unico', financeiro.MIGRACAO_ANO_MES_UNICO),
+    ('008_inicio_minuto_agendamentos', agenda.MIGRACAO_INICIO_MINUTO),
+    ('009_duracao_servicos', servicos.MIGRACAO_DURACAO + [reservas.ESQUEMA_DIAS]),
+    ('010_recursos', recursos.MIGRACAO_RECURSOS),
+    ('011_tarefas', [tarefas.ESQUEMA]),
+    ('012_ocupacao_minutos', reservas.MIGRACAO_OCUPACAO),
+    ('013_versoes_fracionadas', versoes.MIGRACAO_FRACOES),
+    ('014_tarefas_sem_vespera', tarefas.MIGRACAO_SEM_VESPERA),
+]
+
+
+def _aplicadas(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migracoes (
+            nome VARCHAR(100) PRIMARY KEY,
+            aplicada_em DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("SELECT nome FROM schema_migracoes")
+    return {linha['nome'] for linha in cur.fetchall()}
+
+
+# Aplica as migrações pendentes e devolve os nomes aplicadas
+def aplicar(cur):
+    aplicadas = _aplicadas(cur)
+    novas = []
+    for nome, comandos in MIGRACOES:
+        if nome in aplicadas:
+            continue
+        for comando in comandos:
+            if callable(comando):
+                comando(cur)
+            else:
+                cur.execute(comando)
+        cur.execute("INSERT INTO schema_migracoes (nome) VALUES (%s)", (nome,))
+        novas.append(nome)
+    return novas
+
+
+# Consultas mais frequentes do app, com parâmetros de exemplo para o EXPLAIN. O SQL vem das constantes dos
+# módulos que executam cada consulta (nunca uma cópia), para a lista não envelhecer quando elas mudam.
+CONSULTAS_QUENTES = [
+    ('ocupacao_dia', recursos.CONSULTA_OCUPACAO_DIA, ('2024-01-15', 'Ativo')),
+    ('disponibilidade_periodo', recursos.CONSULTA_OCUPACAO_PERIODO, ('2024-01-15', '2024-02-14', 'Ativo')),
+    ('painel_hoje', dashboard.CONSULTA_HOJE, ('2024-01-15',)),
+    ('painel_recentes', dashboard.CONSULTA_RECENTES, ()),
+    ('painel_resumo', resumo.CONSULTA_PERIODO, ('2024-01-01', '2024-02-01')),
+    ('transacoes_pagina', transacoes.CONSULTA_PAGINA, transacoes.parametros_pagina(limite=51)),
+    ('transacoes_pagina_cursor', transacoes.CONSULTA_PAGINA_CURSOR,
+     transacoes.parametros_pagina(('2024-01-15', '10:00', 1000), 51)),
+    ('cancelamentos_mes', transacoes.CONSULTA_CANCELAMENTOS, ('2024-01-01', '2024-02-01')),
+    ('painel_cliente_proximos', cliente.CONSULTA_PROXIMOS, (1, '2024-01-15 10:00')),
+    ('painel_cliente_historico', cliente.CONSULTA_HISTORICO, (1, '2024-01-15 10:00', 21) * 2 + (21,)),
+    ('painel_cliente_visitas', cliente.CONSULTA_VISITAS, (1,) + cliente.STATUS_VISITA + (1,) + cliente.STATUS_VISITA),
+    ('marcar_faltas', tarefas.CONSULTA_FALTAS, ('2024-01-15', '2024-01-15 10:00')),
+]
+
+# Tabelas que nunca devem ser lidas por varredura completa nas consultas quentes
+TABELAS_VIGIADAS = {'a', 'agendamentos', 'agendamentos_resumo', 'agendamentos_arquivo'}
+
+
+# Roda EXPLAIN nas consultas quentes e devolve as que caem em varredura completa (type = ALL).
+# Rode contra um banco populado (ex.: benchmarks/painel.py --popular): em tabelas minúsculas
+# o otimizador pode preferir a varredura mesmo com índice disponível.
+def verificar_planos(cur):
+    problemas = []
+    for nome, sql, params in CONSULTAS_QUENTES:
+        cur.execute("EXPLAIN " + sql, params)
+        for linha in cur.fetchall():
+            if linha['table'] in TABELAS_VIGIADAS and linha['type'] == 'ALL':
+                problemas.append((nome, linha['table'], linha.get('possible_keys')))
+    return problemas
@@ -0,0 +1,220 @@
+# Recursos de atendimento (barbeiros ou cadeiras): cada um com horário semanal próprio e capacidade
+# (atendimentos simultâneos). Os horários ficam em cache, invalidado pela versão da tabela recursos.
+import threading
+
+import agenda
+import horarios
+from versoes import incrementar_versao, versao_atual
+
+# Recurso criado na migração para os agendamentos da época de uma cadeira só
+RECURSO_INICIAL = 'Cadeira 1'
+
+ESQUEMA = [
+    """
+        CREATE TABLE IF NOT EXISTS recursos (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            nome VARCHAR(100) NOT NULL UNIQUE,
+            capacidade TINYINT NOT NULL DEFAULT 1,
+            ativo TINYINT(1) NOT NULL DEFAULT 1
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS recursos_horarios (
+            recurso_id INT NOT NULL,
+            dia_semana VARCHAR(20) NOT NULL,
+            hora_abertura TIME NULL,
+            hora_fechamento TIME NULL,
+            fechado TINYINT(1) NOT NULL DEFAULT 0,
+            PRIMARY KEY (recurso_id, dia_semana)
+        )
+    """,
+]
+
+
+def _recurso_inicial(tabela):
+    return [
+        f"ALTER TABLE {tabela} ADD COLUMN recurso_id INT NULL",
+        f"UPDATE {tabela} SET recurso_id = (SELECT id FROM recursos WHERE nome = '{RECURSO_INICIAL}')",
+    ]
+
+
+# O recurso inicial herda os horários de configuracoes e fica com todos os agendamentos existentes.
+# Vários agendamentos ativos podem começar no mesmo horário (em recursos diferentes): o índice único de
+# (data, horario) sai: as reservas do dia são serializadas pelo lock de dias_agenda, e a tabela
+# ocupacao_minutos (reservas.MIGRACAO_OCUPACAO, migração 012) faz a garantia de capacidade no banco.
+MIGRACAO_RECURSOS = ESQUEMA + [
+    f"INSERT IGNORE INTO recursos (nome) VALUES ('{RECURSO_INICIAL}')",
+    f"""
+        INSERT IGNORE INTO recursos_horarios (recurso_id, dia_semana, hora_abertura, hora_fechamento, fechado)
+        SELECT r.id, c.dia_semana, c.hora_abertura, c.hora_fechamento, c.fechado
+        FROM configuracoes c
+        JOIN recursos r ON r.nome = '{RECURSO_INICIAL}'
+    """,
+] + _recurso_inicial('agendamentos') + [
+    """
+        ALTER TABLE agendamentos
+        MODIFY recurso_id INT NOT NULL,
+        DROP INDEX uq_agendamentos_slot_ativo,
+        ADD KEY idx_agendamentos_data_recurso (data, recurso_id)
+    """,
+] + _recurso_inicial('agendamentos_arquivo')
+
+_lock = threading.Lock()
+_cache = {'versao': None, 'recursos': [], 'semana': {}}
+
+
+def invalidar():
+    with _lock:
+        _cache['versao'] = None
+        _cache['recursos'] = []
+        _cache['semana'] = {}
+
+
+def _carregar(cur):
+    versao = versao_atual(cur, 'recursos')
+    if versao == _cache['versao']:
+        return _cache
+    cur.execute("SELECT id, nome, capacidade, ativo FROM recursos ORDER BY id")
+    recursos = cur.fetchall()
+    cur.execute("SELECT recurso_id, dia_semana, hora_abertura, hora_fechamento, fechado FROM recursos_horarios")
+    expedientes = {}
+    for linha in cur.fetchall():
+        if linha['fechado'] or linha['hora_abertura'] is None or linha['hora_fechamento'] is None:
+            continue
+        dia = horarios.DIAS_SEMANA.index(linha['dia_semana'])
+        expedientes[(linha['recurso_id'], dia)] = (agenda.minutos(linha['hora_abertura']),
+                                                   agenda.minutos(linha['hora_fechamento']))
+    semana = {dia: [] for dia in range(7)}
+    for recurso in recursos:
+        recurso['horarios'] = {dia: expedientes[(recurso['id'], dia)] for dia in range(7)
+                               if (recurso['id'], dia) in expedientes}
+        if recurso['ativo']:
+            for dia, (abertura, fechamento) in recurso['horarios'].items():
+                semana[dia].append((recurso, abertura, fechamento))
+    with _lock:
+        _cache['versao'] = versao
+        _cache['recursos'] = recursos
+        _cache['semana'] = semana
+    return _cache
+
+
+# Todos os recursos, com os horários da semana em HH:MM: {'id', 'nome', 'capacidade', 'ativo', 'horarios'}
+def listar(cur):
+    return [
+        dict(recurso, horarios={
+            horarios.DIAS_SEMANA[dia]: {'hora_abertura': agenda.formatar(abertura), 'hora_fechamento': agenda.formatar(fechamento)}
+            for dia, (abertura, fechamento) in sorted(recurso['horarios'].items())
+        })
+        for recurso in _carregar(cur)['recursos']
+    ]
+
+
+# Recursos ativos que atendem em cada dia da semana: {dia: [(recurso, abertura, fechamento)]}
+def da_semana(cur):
+    return _carregar(cur)['semana']
+
+
+# Agendamentos ativos que ocupam recursos: num dia (data, status) e num período [inicio, fim) (inicio, fim, status)
+CONSULTA_OCUPACAO_DIA = "SELECT recurso_id, minuto, duracao FROM agendamentos WHERE data = %s AND status = %s"
+CONSULTA_OCUPACAO_PERIODO = ("SELECT data, recurso_id, minuto, duracao FROM agendamentos "
+                             "WHERE data >= %s AND data < %s AND status = %s")
+
+
+# Ocupação de um dia: um índice de intervalos por recurso, montado dos agendamentos ativos do dia
+# ({'recurso_id', 'minuto', 'duracao'}). Um atendimento cabe num recurso se fica dentro do horário dele
+# e sobrepõe menos agendamentos que a capacidade (conservador quando a capacidade é maior que 1).
+class OcupacaoDia:
+    def __init__(self, recursos_do_dia, agendamentos):
+        intervalos = {}
+        for agendamento in agendamentos:
+            intervalos.setdefault(agendamento['recurso_id'], []).append(
+                (agendamento['minuto'], agendamento['minuto'] + agendamento['duracao']))
+        self._recursos = [
+            (recurso, abertura, fechamento, agenda.IndiceIntervalos(intervalos.get(recurso['id'], ())))
+            for recurso, abertura, fechamento in recursos_do_dia
+        ]
+
+    def _livres(self, minuto, duracao):
+        fim = minuto + duracao
+        for recurso, abertura, fechamento, indice in self._recursos:
+            if abertura <= minuto and fim <= fechamento and indice.sobreposicoes(minuto, fim) < recurso['capacidade']:
+                yield recurso, indice
+
+    # Recurso livre com menos minutos reservados no dia (empate: menor id), ou None se nenhum couber
+    def escolher(self, minuto, duracao):
+        livres = list(self._livres(minuto, duracao))
+        if not livres:
+            return None
+        return min(livres, key=lambda par: (par[1].carga(), par[0]['id']))[0]
+
+    # Inícios da grade sem nenhum recurso livre para `duracao` minutos, numa passada pela grade
+    def indisponiveis(self, grade_dia, duracao):
+        return [minuto for minuto in grade_dia if next(self._livres(minuto, duracao), None) is None]
+
+
+# Horários da grade (HH:MM) sem recurso livre para um atendimento de `duracao` minutos
+def horarios_indisponiveis(grade, recursos_do_dia, agendamentos, duracao):
+    if not grade:
+        return []
+    ocupacao = OcupacaoDia(recursos_do_dia, agendamentos)
+    ocupados = ocupacao.indisponiveis([agenda.minutos(horario) for horario in grade], duracao)
+    return [agenda.formatar(minuto) for minuto in ocupados]
+
+
+# Grade do dia, intervalo e horários indisponíveis para `duracao` (sem duração, vale um intervalo da grade)
+def disponibilidade_do_dia(cur, dia_semana, agendamentos, duracao=None):
+    grade, intervalo = horarios.grade_do_dia(cur, dia_semana)
+    return grade, intervalo, horarios_indisponiveis(grade, da_semana(cur)[dia_semana], agendamentos,
+                                                    duracao or intervalo)
+
+
+# Semeia o recurso inicial com o expediente geral (configuracoes) nos dias em que ele ainda não tem
+# horário próprio. Dias já cadastrados (inclusive os ajustados em /admin/recursos) nunca são sobrescritos:
+# mudar o expediente do recurso é feito na tela de recursos. Chamar na mesma transação do UPDATE de
+# configuracoes. O chamador faz o commit; chame invalidar() depois dele.
+def alinhar_recurso_inicial(cur):
+    cur.execute(f"""
+        INSERT INTO recursos_horarios (recurso_id, dia_semana, hora_abertura, hora_fechamento, fechado)
+        SELECT r.id, c.dia_semana, c.hora_abertura, c.hora_fechamento, c.fechado
+        FROM configuracoes c
+        JOIN recursos r ON r.nome = '{RECURSO_INICIAL}'
+        LEFT JOIN recursos_horarios rh ON rh.recurso_id = r.id AND rh.dia_semana = c.dia_semana
+        WHERE rh.recurso_id IS NULL
+    """)
+    if cur.rowcount:
+        incrementar_versao(cur, 'recursos')
+
+
+# Cadastra ou altera um recurso; `horarios_semana` ({dia_semana: {'hora_abertura', 'hora_fechamento'}},
+# None = fechado) substitui só os dias informados. Levanta ValueError com dados inválidos.
+# O chamador faz o commit; chame invalidar() depois dele.
+def salvar(cur, nome, capacidade=1, ativo=True, horarios_semana=None):
+    if not nome or not 1 <= capacidade <= 20:
+        raise ValueError('Informe o nome e uma capacidade entre 1 e 20.')
+    linhas = []
+    for dia, expediente in (horarios_semana or {}).items():
+        if dia not in horarios.DIAS_SEMANA:
+            raise ValueError(f'Dia da semana inválido: {dia}.')
+        if expediente is None:
+            linhas.append((dia, None, None, True))
+            continue
+        abertura = agenda.minutos(expediente.get('hora_abertura'))
+        fechamento = agenda.minutos(expediente.get('hora_fechamento'))
+        if abertura is None or fechamento is None or abertura >= fechamento:
+            raise ValueError(f'Horário inválido para {dia}: a abertura deve ser antes do fechamento.')
+        linhas.append((dia, agenda.formatar(abertura), agenda.formatar(fechamento), False))
+    cur.execute("""
+        INSERT INTO recursos (nome, capacidade, ativo) VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE capacidade = VALUES(capacidade), ativo = VALUES(ativo)
+    """, (nome, capacidade, ativo))
+    cur.execute("SELECT id FROM recursos WHERE nome = %s", (nome,))
+    recurso_id = cur.fetchone()['id']
+    if linhas:
+        cur.executemany("""
+            INSERT INTO recursos_horarios (recurso_id, dia_semana, hora_abertura, hora_fechamento, fechado)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE hora_abertura = VALUES(hora_abertura), hora_fechamento = VALUES(hora_fechamento),
+                                    fechado = VALUES(fechado)
+        """, [(recurso_id, *linha) for linha in linhas])
+    incrementar_versao(cur, 'recursos')
+    return recurso_id
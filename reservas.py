@@ -0,0 +1,218 @@
+# Reserva de horários: um atendimento ocupa [inicio, inicio + duração do serviço) num recurso (barbeiro ou
+# cadeira) e não pode passar da capacidade dele.
+# Modelo de concorrência: lock pessimista por dia. A reserva trava a linha do dia (dias_agenda) e, se outra
+# reserva do mesmo dia está em andamento, espera por ela (uma reserva leva milissegundos) no máximo
+# ESPERA_DIA segundos; só quando a espera se esgota falha com DiaEmReserva (503, servidor ocupado), que não
+# é conflito: 409 fica para o horário de fato ocupado. Com o dia travado, a ocupação é lida com leitura
+# travada (FOR UPDATE), que enxerga o último commit e não o snapshot da transação, então a escolha do recurso
+# e o INSERT acontecem sem corrida.
+# No banco, a tabela ocupacao_minutos (mantida por triggers) recusa qualquer agendamento ativo que passe da
+# capacidade do recurso, venha de onde vier o INSERT/UPDATE.
+import MySQLdb
+
+import agenda
+import horarios
+import recursos
+import resumo
+import servicos
+import versoes
+
+ERRO_CHECK_VIOLADO = 3819
+ERRO_ESPERA_ESGOTADA = 1205
+ERRO_DEADLOCK = 1213
+
+# Espera máxima (segundos) pelo lock do dia (innodb_lock_wait_timeout só durante o travamento)
+ESPERA_DIA = 3
+
+# Coluna gerada que só é preenchida em agendamentos ativos: como o índice único ignora NULLs,
+# cancelados/concluídos/arquivados não bloqueiam o horário. (O índice sai com os recursos, na migração 010.)
+MIGRACAO_SLOT_UNICO = [
+    # Cancela reservas duplicadas já existentes (mantém a mais antiga) para o índice poder ser criado
+    """
+        UPDATE agendamentos a
+        JOIN agendamentos b ON a.data = b.data AND a.horario = b.horario AND b.id < a.id
+        SET a.status = 'Cancelado', a.motivo_cancelamento = 'Horário reservado em duplicidade'
+        WHERE a.status = 'Ativo' AND b.status = 'Ativo'
+    """,
+    """
+        ALTER TABLE agendamentos
+        ADD COLUMN slot_ativo TINYINT GENERATED ALWAYS AS (IF(status = 'Ativo', 1, NULL)) STORED,
+        ADD UNIQUE KEY uq_agendamentos_slot_ativo (data, horario, slot_ativo)
+    """,
+]
+
+
+# Uma linha por dia com reservas: o lock dela serializa as reservas do dia
+ESQUEMA_DIAS = """
+    CREATE TABLE IF NOT EXISTS dias_agenda (
+        data DATE PRIMARY KEY
+    )
+"""
+
+
+# Ocupação dos agendamentos ativos já existentes (antes dos triggers). Sobreposições antigas, da corrida que
+# esta tabela fecha, entram com a capacidade elevada ao que já está ocupado: novas reservas nesses minutos
+# são recusadas até os excedentes saírem de Ativo.
+def _preencher_ocupacao(cur):
+    cur.execute("""
+        SELECT a.recurso_id, a.data, a.minuto, a.duracao, r.capacidade
+        FROM agendamentos a JOIN recursos r ON r.id = a.recurso_id
+        WHERE a.status = 'Ativo'
+    """)
+    ocupados = {}
+    capacidades = {}
+    for linha in cur.fetchall():
+        capacidades[linha['recurso_id']] = linha['capacidade']
+        for minuto in range(linha['minuto'], linha['minuto'] + linha['duracao']):
+            chave = (linha['recurso_id'], linha['data'], minuto)
+            ocupados[chave] = ocupados.get(chave, 0) + 1
+    if ocupados:
+        cur.executemany(
+            "INSERT INTO ocupacao_minutos (recurso_id, data, minuto, ocupados, capacidade) VALUES (%s, %s, %s, %s, %s)",
+            [chave + (total, max(total, capacidades[chave[0]])) for chave, total in ocupados.items()])
+
+
+# Agendamentos ativos por recurso e minuto do dia. O CHECK recusa passar da capacidade (gravada em cada
+# linha a partir de recursos); os triggers de agendamentos ocupam e liberam os minutos quando um agendamento
+# entra ou sai do status Ativo (ou é apagado). Requer MySQL 8.0.16+ (CHECK aplicado) e, com log binário,
+# um usuário com permissão para criar triggers.
+MIGRACAO_OCUPACAO = [
+    """
+        CREATE TABLE IF NOT EXISTS ocupacao_minutos (
+            recurso_id INT NOT NULL,
+            data DATE NOT NULL,
+            minuto SMALLINT NOT NULL,
+            ocupados TINYINT NOT NULL,
+            capacidade TINYINT NOT NULL,
+            PRIMARY KEY (recurso_id, data, minuto),
+            CONSTRAINT ck_ocupacao_capacidade CHECK (ocupados <= capacidade)
+        )
+    """,
+    "DROP PROCEDURE IF EXISTS ajustar_ocupacao",
+    """
+        CREATE PROCEDURE ajustar_ocupacao(p_recurso INT, p_data DATE, p_minuto INT, p_duracao INT, p_delta INT)
+        BEGIN
+            DECLARE v_minuto INT DEFAULT p_minuto;
+            DECLARE v_capacidade INT;
+            IF p_delta > 0 THEN
+                SELECT capacidade INTO v_capacidade FROM recursos WHERE id = p_recurso;
+                WHILE v_minuto < p_minuto + p_duracao DO
+                    INSERT INTO ocupacao_minutos (recurso_id, data, minuto, ocupados, capacidade)
+                    VALUES (p_recurso, p_data, v_minuto, 1, v_capacidade)
+                    ON DUPLICATE KEY UPDATE ocupados = ocupados + 1, capacidade = VALUES(capacidade);
+                    SET v_minuto = v_minuto + 1;
+                END WHILE;
+            ELSE
+                UPDATE ocupacao_minutos SET ocupados = ocupados - 1
+                WHERE recurso_id = p_recurso AND data = p_data AND minuto >= p_minuto AND minuto < p_minuto + p_duracao;
+                DELETE FROM ocupacao_minutos
+                WHERE recurso_id = p_recurso AND data = p_data AND minuto >= p_minuto AND minuto < p_minuto + p_duracao
+                  AND ocupados <= 0;
+            END IF;
+        END
+    """,
+    _preencher_ocupacao,
+    """
+        CREATE TRIGGER trg_agendamentos_ocupar AFTER INSERT ON agendamentos FOR EACH ROW
+        BEGIN
+            IF NEW.status = 'Ativo' THEN
+                CALL ajustar_ocupacao(NEW.recurso_id, NEW.data, NEW.minuto, NEW.duracao, 1);
+            END IF;
+        END
+    """,
+    """
+        CREATE TRIGGER trg_agendamentos_reocupar AFTER UPDATE ON agendamentos FOR EACH ROW
+        BEGIN
+            IF NOT (OLD.status <=> NEW.status AND OLD.recurso_id <=> NEW.recurso_id AND OLD.data <=> NEW.data
+                    AND OLD.minuto <=> NEW.minuto AND OLD.duracao <=> NEW.duracao) THEN
+                IF OLD.status = 'Ativo' THEN
+                    CALL ajustar_ocupacao(OLD.recurso_id, OLD.data, OLD.minuto, OLD.duracao, -1);
+                END IF;
+                IF NEW.status = 'Ativo' THEN
+                    CALL ajustar_ocupacao(NEW.recurso_id, NEW.data, NEW.minuto, NEW.duracao, 1);
+                END IF;
+            END IF;
+        END
+    """,
+    """
+        CREATE TRIGGER trg_agendamentos_liberar AFTER DELETE ON agendamentos FOR EACH ROW
+        BEGIN
+            IF OLD.status = 'Ativo' THEN
+                CALL ajustar_ocupacao(OLD.recurso_id, OLD.data, OLD.minuto, OLD.duracao, -1);
+            END IF;
+        END
+    """,
+]
+
+
+class HorarioOcupado(Exception):
+    pass
+
+
+class ForaDoExpediente(ValueError):
+    pass
+
+
+# O lock do dia não saiu em ESPERA_DIA segundos (reservas demais no mesmo dia): servidor ocupado, não conflito
+class DiaEmReserva(Exception):
+    pass
+
+
+# Cria e trava a linha do dia numa só instrução: o INSERT com ON DUPLICATE KEY pega o lock exclusivo da linha
+# existente (ou espera a primeira reserva do dia criá-la), sem o par SELECT/INSERT que viraria deadlock.
+# O lock vai até o commit da transação; a espera vale só para este comando.
+def _travar_dia(cur, data):
+    cur.execute("SET SESSION innodb_lock_wait_timeout = %s", (ESPERA_DIA,))
+    try:
+        cur.execute("INSERT INTO dias_agenda (data) VALUES (%s) ON DUPLICATE KEY UPDATE data = data", (data,))
+    except MySQLdb.DatabaseError as e:
+        if e.args and e.args[0] in (ERRO_ESPERA_ESGOTADA, ERRO_DEADLOCK):
+            raise DiaEmReserva(f'Muitas reservas para {data} neste momento; tente de novo em instantes.') from e
+        raise
+    finally:
+        cur.execute("SET SESSION innodb_lock_wait_timeout = DEFAULT")
+
+
+# Insere o agendamento com o preço e a duração atuais do serviço no recurso livre menos ocupado do dia
+# e devolve (id, recurso). Levanta:
+# - HorarioOcupado se nenhum recurso tem o horário livre (ou se o banco recusar por capacidade);
+# - DiaEmReserva se o lock do dia não saiu em ESPERA_DIA segundos;
+# - ForaDoExpediente se a barbearia não abre no dia, o horário não está na grade do dia (abertura + múltiplos
+#   do intervalo) ou o atendimento não cabe no horário de funcionamento;
+# - servicos.ServicoInvalido se o serviço não existir ou estiver desativado;
+# - ValueError se o horário não estiver em HH:MM (que é normalizado, ex.: '9:00' -> '09:00').
+# O chamador faz o commit (ou rollback, em caso de erro).
+def reservar(cur, usuario_id, data, horario, servico):
+    catalogado = servicos.obter(cur, servico)
+    minuto = agenda.minutos(horario)
+    horario = agenda.formatar(minuto)
+    inicio = agenda.inicio(data, minuto)
+    fim = minuto + catalogado['duracao']
+    expediente = horarios.expediente(cur, inicio.weekday())
+    if expediente is None or minuto < expediente[0] or fim > expediente[1]:
+        raise ForaDoExpediente(f'{servico} às {horario} de {data} fica fora do horário de funcionamento.')
+    grade, intervalo = horarios.grade_do_dia(cur, inicio.weekday())
+    if horario not in grade:
+        raise ForaDoExpediente(f'{horario} não é um horário da agenda de {data} (de {intervalo} em {intervalo} minutos).')
+
+    _travar_dia(cur, data)
+    cur.execute(recursos.CONSULTA_OCUPACAO_DIA + " FOR UPDATE", (data, 'Ativo'))
+    ocupacao = recursos.OcupacaoDia(recursos.da_semana(cur)[inicio.weekday()], cur.fetchall())
+    recurso = ocupacao.escolher(minuto, catalogado['duracao'])
+    if recurso is None:
+        raise HorarioOcupado(f'O horário {horario} de {data} já está reservado.')
+    try:
+        cur.execute("""
+            INSERT INTO agendamentos
+                (usuario_id, data, horario, minuto, inicio, servico, servico_id, preco, duracao, recurso_id, status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (usuario_id, data, horario, minuto, inicio, servico, catalogado['id'], catalogado['preco'],
+              catalogado['duracao'], recurso['id'], 'Ativo'))
+    except MySQLdb.DatabaseError as e:
+        if e.args and e.args[0] == ERRO_CHECK_VIOLADO:
+            raise HorarioOcupado(f'O horário {horario} de {data} já está reservado.') from e
+        raise
+    agendamento_id = cur.lastrowid
+    resumo.registrar_transicao(cur, {'data': data, 'horario': horario, 'servico': servico, 'preco': catalogado['preco']}, 'Ativo')
+    versoes.incrementar_versao(cur, 'agendamentos', data)
+    return agendamento_id, recurso
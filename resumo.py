@@ -0,0 +1,102 @@
+# Resumo diário de agendamentos e faturamento, mantido a cada mudança de status
+import arquivo
+
+# Atendimentos realizados: concluídos e os já arquivados pelo fechamento do dia (contam como receita)
+STATUS_REALIZADOS = ('Concluído', 'Arquivado')
+
+ESQUEMA = """
+    CREATE TABLE IF NOT EXISTS agendamentos_resumo (
+        data DATE NOT NULL,
+        servico VARCHAR(100) NOT NULL,
+        hora CHAR(2) NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        total INT NOT NULL DEFAULT 0,
+        receita DECIMAL(12, 2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (data, servico, hora, status)
+    )
+"""
+
+_AJUSTE = """
+    INSERT INTO agendamentos_resumo (data, servico, hora, status, total, receita)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE total = total + VALUES(total), receita = receita + VALUES(receita)
+"""
+
+
+def _chave(agendamento, status):
+    return (str(agendamento['data']), agendamento['servico'], agendamento['horario'][:2], status)
+
+
+# deltas: chave -> [total, receita]
+def _aplicar(cur, deltas):
+    linhas = [chave + (total, receita) for chave, (total, receita) in deltas.items() if total or receita]
+    if linhas:
+        cur.executemany(_AJUSTE, linhas)
+
+
+# Move agendamentos do status atual (chave 'status', ausente em novos agendamentos) para status_novo,
+# somando o preço gravado em cada agendamento (chave 'preco') à receita.
+# Deve ser chamada na mesma transação do UPDATE/INSERT em agendamentos.
+def registrar_transicao(cur, agendamentos, status_novo):
+    if isinstance(agendamentos, dict):
+        agendamentos = [agendamentos]
+    deltas = {}
+    for agendamento in agendamentos:
+        anterior = agendamento.get('status')
+        if anterior == status_novo:
+            continue
+        preco = agendamento.get('preco') or 0
+        if anterior is not None:
+            delta = deltas.setdefault(_chave(agendamento, anterior), [0, 0])
+            delta[0] -= 1
+            delta[1] -= preco
+        delta = deltas.setdefault(_chave(agendamento, status_novo), [0, 0])
+        delta[0] += 1
+        delta[1] += preco
+    _aplicar(cur, deltas)
+
+
+# Contagem e receita agrupadas, calculadas diretamente de agendamentos (incluindo o arquivo frio)
+def _contar_agendamentos(cur):
+    cur.execute("""
+        SELECT data, servico, SUBSTRING(horario, 1, 2) AS hora, status, COUNT(*) AS total, SUM(preco) AS receita
+        FROM (""" + arquivo.em_ambas("SELECT data, servico, horario, status, preco FROM {tabela}") + """) a
+        GROUP BY data, servico, hora, status
+    """)
+    return {(str(l['data']), l['servico'], l['hora'], l['status']): (l['total'], l['receita'] or 0) for l in cur.fetchall()}
+
+
+# Recria o resumo inteiro a partir de agendamentos (backfill)
+def reconstruir(cur):
+    cur.execute(ESQUEMA)
+    cur.execute(arquivo.ESQUEMA)
+    cur.execute("DELETE FROM agendamentos_resumo")
+    contagem = _contar_agendamentos(cur)
+    _aplicar(cur, contagem)
+    return len(contagem)
+
+
+# Compara o resumo com agendamentos e devolve as divergências como
+# (chave, (total, receita) esperados, (total, receita) no resumo)
+def verificar(cur):
+    esperado = _contar_agendamentos(cur)
+    cur.execute("SELECT data, servico, hora, status, total, receita FROM agendamentos_resumo WHERE total <> 0 OR receita <> 0")
+    atual = {(str(l['data']), l['servico'], l['hora'], l['status']): (l['total'], l['receita']) for l in cur.fetchall()}
+    return [
+        (chave, esperado.get(chave, (0, 0)), atual.get(chave, (0, 0)))
+        for chave in sorted(set(esperado) | set(atual))
+        if esperado.get(chave, (0, 0)) != atual.get(chave, (0, 0))
+    ]
+
+
+# Linhas do resumo num intervalo semiaberto [inicio, fim)
+CONSULTA_PERIODO = """
+    SELECT data, servico, hora, status, total, receita
+    FROM agendamentos_resumo
+    WHERE data >= %s AND data < %s AND total <> 0
+"""
+
+
+def ler_periodo(cur, inicio, fim):
+    cur.execute(CONSULTA_PERIODO, (inicio, fim))
+    return cur.fetchall()
@@ -0,0 +1,3 @@
+# Blueprints das rotas, importados por create_app só quando listados em BLUEPRINTS: autenticacao
+# (menu, cadastro, login), agendamento (disponibilidade, reservas, painel do cliente), administracao
+# (painel, agenda, catálogo, recursos, eventos, métricas) e financas (transações e cancelamentos)
@@ -0,0 +1,383 @@
+# Administração: painel, horários, agenda (concluir, cancelar, arquivar), catálogo de serviços,
+# recursos, eventos ao vivo e métricas
+from flask import Blueprint, render_template, request, redirect, url_for, jsonify, Response
+from flask_login import login_required, current_user
+from datetime import datetime
+from dashboard import carregar_snapshot
+import eventos
+from extensoes import admissao, broker, cache_respostas, cache_usuarios, cache_visitas, invalidar_visitas, mysql
+import financeiro
+import horarios
+import lote
+import recursos
+import resumo
+import servicos
+import tarefas
+import versoes
+
+bp = Blueprint('administracao', __name__)
+
+# Configurar Horários (Admin) - Apenas API para processar os dados
+@bp.route('/admin/config-horarios', methods=['POST'])
+@login_required
+def config_horarios():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Acesso não autorizado.'}), 403
+
+    try:
+        data = request.get_json()
+        intervalo_agendamento = int(data.get('intervalo_agendamento', 30))
+
+        # Validar todos os dias antes de gravar qualquer um
+        atualizacoes = []
+        for dia in horarios.DIAS_SEMANA:
+            fechado = data.get(f'fechado_{dia}') == 'on'
+            hora_abertura = data.get(f'hora_abertura_{dia}') if not fechado else None
+            hora_fechamento = data.get(f'hora_fechamento_{dia}') if not fechado else None
+
+            if not fechado and hora_abertura and hora_fechamento:
+                try:
+                    if len(hora_abertura.split(':')) == 3:
+                        hora_abertura = hora_abertura[:-3]
+                    if len(hora_fechamento.split(':')) == 3:
+                        hora_fechamento = hora_fechamento[:-3]
+                    hora_abertura_dt = datetime.strptime(hora_abertura, '%H:%M')
+                    hora_fechamento_dt = datetime.strptime(hora_fechamento, '%H:%M')
+                    if hora_abertura_dt >= hora_fechamento_dt:
+                        return jsonify({'success': False, 'message': f'Erro: A hora de abertura deve ser anterior à hora de fechamento para {dia}.'}), 400
+                except ValueError as e:
+                    return jsonify({'success': False, 'message': f'Erro: Formato de hora inválido para {dia}. Use o formato HH:MM (ex.: 09:00). Erro: {str(e)}'}), 400
+            elif not fechado and (not hora_abertura or not hora_fechamento):
+                return jsonify({'success': False, 'message': f'Erro: Por favor, preencha os horários de abertura e fechamento para {dia}.'}), 400
+
+            atualizacoes.append((hora_abertura, hora_fechamento, fechado, intervalo_agendamento, dia))
+
+        with mysql.transacao() as cur:
+            cur.executemany("""
+                UPDATE configuracoes 
+                SET hora_abertura = %s, hora_fechamento = %s, fechado = %s, intervalo_agendamento = %s 
+                WHERE dia_semana = %s
+            """, atualizacoes)
+            versoes.incrementar_versao(cur, 'configuracoes')
+            recursos.alinhar_recurso_inicial(cur)
+        horarios.invalidar()
+        recursos.invalidar()
+        with mysql.cursor() as cur:
+            configuracoes_atualizadas = horarios.configuracoes_semana(cur)
+        intervalo_atualizado = configuracoes_atualizadas[0]['intervalo_agendamento']
+        broker.publicar('configuracoes_atualizadas', {'configuracoes': configuracoes_atualizadas,
+                                                      'intervalo_agendamento': intervalo_atualizado})
+        return jsonify({
+            'success': True,
+            'message': 'Horários atualizados com sucesso!',
+            'configuracoes': configuracoes_atualizadas,
+            'intervalo_agendamento': intervalo_atualizado
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Erro ao atualizar os horários: {str(e)}'}), 500
+
+# Painel do Administrador
+@bp.route('/admin/painel', methods=['GET', 'POST'])
+@login_required
+@cache_respostas.condicional('agendamentos', 'configuracoes', 'financeiro', granularidade='minuto')
+def admin_painel():
+    if not current_user.is_admin:
+        return redirect(url_for('autenticacao.menu'))
+
+    agora = datetime.now()
+
+    # Salvar a planilha financeira do ano (campos ausentes mantêm o valor atual)
+    if request.method == 'POST':
+        with mysql.transacao() as cur:
+            serie = financeiro.serie_anual(cur, agora.year)
+            financeiro.salvar(cur, agora.year, {
+                mes: (float(request.form.get(f'receita_{mes}', serie['receitas'][i])),
+                      float(request.form.get(f'despesa_{mes}', abs(serie['despesas'][i]))))
+                for i, mes in enumerate(serie['meses'])
+            })
+        financeiro.invalidar()
+        return redirect(url_for('administracao.admin_painel'))
+
+    with mysql.cursor() as cur:
+        # Buscar configurações
+        configuracoes = horarios.configuracoes_semana(cur)
+
+        # Intervalo de agendamento
+        intervalo_agendamento = configuracoes[0]['intervalo_agendamento'] if configuracoes else 30
+
+        # Status, financeiro, desempenho, fidelização e controle do tempo
+        painel = carregar_snapshot(cur, agora, intervalo_agendamento)
+
+        # Dados para os gráficos financeiros (12 meses do ano, em cache)
+        serie = financeiro.serie_anual(cur, agora.year)
+        meses, receitas, despesas = serie['meses'], serie['receitas'], serie['despesas']
+
+    orcamento = {
+        'meta': 5000,
+        'progresso': [painel.total_mes * (i + 1) / len(meses) for i in range(len(meses))]
+    }
+
+    return render_template('admin_painel.html', usuario=current_user, painel=painel,
+                         configuracoes=configuracoes, intervalo_agendamento=intervalo_agendamento,
+                         meses=meses, receitas=receitas, despesas=despesas, orcamento=orcamento,
+                         **painel.contexto())
+
+# Resetar Cortes Concluídos
+@bp.route('/admin/resetar-cortes-concluidos', methods=['POST'])
+@login_required
+def resetar_cortes_concluidos():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Acesso não autorizado.'}), 403
+
+    try:
+        hoje = datetime.now().strftime('%Y-%m-%d')
+        with mysql.transacao() as cur:
+            afetados = len(lote.arquivar(cur, data_inicio=hoje, data_fim=hoje))
+        broker.publicar('cortes_arquivados', {'data': hoje, 'total': afetados})
+        return jsonify({
+            'success': True, 
+            'message': f'{afetados} corte(s) concluído(s) foram movidos para o histórico com sucesso!'
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Erro ao mover cortes concluídos para o histórico: {str(e)}'}), 500
+
+# Arquivar cortes concluídos por filtro (Admin - AJAX): período e/ou serviço. Sem período, só com
+# "todos": true no corpo (um corpo vazio não arquiva tudo por engano)
+@bp.route('/admin/agendamentos/arquivar', methods=['POST'])
+@login_required
+def arquivar_agendamentos():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Acesso não autorizado.'}), 403
+
+    data = request.get_json() or {}
+    try:
+        for campo in ('data_inicio', 'data_fim'):
+            if data.get(campo):
+                datetime.strptime(data[campo], '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Datas inválidas. Use o formato AAAA-MM-DD.'}), 400
+    if not data.get('data_inicio') and not data.get('data_fim') and data.get('todos') is not True:
+        return jsonify({'success': False,
+                        'message': 'Informe o período (data_inicio e/ou data_fim) ou "todos": true para arquivar todos.'}), 400
+
+    try:
+        with mysql.transacao() as cur:
+            arquivados = lote.arquivar(cur, data.get('data_inicio'), data.get('data_fim'), data.get('servico'),
+                                       todos=data.get('todos') is True)
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Erro ao arquivar os cortes: {str(e)}'}), 500
+    broker.publicar('agendamentos_atualizados', {'status': 'Arquivado', 'ids': [a['id'] for a in arquivados]})
+    return jsonify({'success': True, 'message': f'{len(arquivados)} corte(s) concluído(s) movidos para o histórico.',
+                    'total': len(arquivados)})
+
+# Cancelar Agendamento (Admin - AJAX)
+@bp.route('/cancel_appointment', methods=['POST'])
+@login_required
+def cancel_appointment():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Acesso não autorizado.'}), 403
+
+    data = request.get_json()
+    appointment_id = data.get('appointment_id')
+    if not appointment_id:
+        return jsonify({'success': False, 'message': 'ID do agendamento não fornecido.'}), 400
+
+    try:
+        with mysql.transacao() as cur:
+            cur.execute("SELECT * FROM agendamentos WHERE id = %s AND status = 'Ativo' FOR UPDATE", (appointment_id,))
+            agendamento = cur.fetchone()
+            if not agendamento:
+                return jsonify({'success': False, 'message': 'Agendamento não encontrado ou já cancelado.'}), 404
+            cur.execute("UPDATE agendamentos SET status = %s, motivo_cancelamento = %s WHERE id = %s", 
+                        ('Cancelado', 'Cancelado pelo administrador', appointment_id))
+            resumo.registrar_transicao(cur, agendamento, 'Cancelado')
+            versoes.incrementar_versao(cur, 'agendamentos', agendamento['data'])
+        broker.publicar('agendamento_cancelado', {'id': agendamento['id'], 'data': agendamento['data'],
+                                                  'horario': agendamento['horario'], 'motivo': 'Cancelado pelo administrador'})
+        return jsonify({'success': True, 'message': 'Agendamento cancelado com sucesso!'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Erro ao cancelar o agendamento: {str(e)}'}), 500
+
+# Concluir Agendamento (Admin - AJAX)
+@bp.route('/complete_appointment', methods=['POST'])
+@login_required
+def complete_appointment():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Acesso não autorizado.'}), 403
+
+    data = request.get_json()
+    appointment_id = data.get('appointment_id')
+    if not appointment_id:
+        return jsonify({'success': False, 'message': 'ID do agendamento não fornecido.'}), 400
+
+    try:
+        with mysql.transacao() as cur:
+            cur.execute("SELECT * FROM agendamentos WHERE id = %s AND status = 'Ativo' FOR UPDATE", (appointment_id,))
+            agendamento = cur.fetchone()
+            if not agendamento:
+                return jsonify({'success': False, 'message': 'Agendamento não encontrado ou já concluído/cancelado.'}), 404
+            cur.execute("UPDATE agendamentos SET status = %s WHERE id = %s", 
+                        ('Concluído', appointment_id))
+            resumo.registrar_transicao(cur, agendamento, 'Concluído')
+            versoes.incrementar_versao(cur, 'agendamentos', agendamento['data'])
+        invalidar_visitas(agendamento['usuario_id'])
+        broker.publicar('agendamento_concluido', {'id': agendamento['id'], 'data': agendamento['data'],
+                                                  'horario': agendamento['horario'], 'servico': agendamento['servico'],
+                                                  'preco': agendamento['preco']})
+        return jsonify({'success': True, 'message': 'Agendamento concluído com sucesso!'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Erro ao concluir o agendamento: {str(e)}'}), 500
+
+# Concluir/Cancelar vários agendamentos de uma vez (Admin - AJAX)
+@bp.route('/admin/agendamentos/status', methods=['POST'])
+@login_required
+def atualizar_status_agendamentos():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Acesso não autorizado.'}), 403
+
+    data = request.get_json() or {}
+    ids = data.get('ids')
+    status = data.get('status')
+    if status not in ('Concluído', 'Cancelado'):
+        return jsonify({'success': False, 'message': 'Status inválido (use Concluído ou Cancelado).'}), 400
+    if not isinstance(ids, list) or not ids:
+        return jsonify({'success': False, 'message': 'Nenhum ID de agendamento fornecido.'}), 400
+    if len(ids) > lote.MAXIMO_IDS:
+        return jsonify({'success': False, 'message': f'Envie no máximo {lote.MAXIMO_IDS} agendamentos por vez.'}), 400
+
+    try:
+        with mysql.transacao() as cur:
+            resultados, alterados = lote.atualizar_status(cur, ids, status, data.get('motivo', 'Cancelado pelo administrador'))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'IDs de agendamento inválidos.'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Erro ao atualizar os agendamentos: {str(e)}'}), 500
+    for usuario_id in {a['usuario_id'] for a in alterados}:
+        invalidar_visitas(usuario_id)
+    if alterados:
+        broker.publicar('agendamentos_atualizados', {'status': status, 'ids': [a['id'] for a in alterados]})
+    return jsonify({'success': True, 'message': f'{len(alterados)} agendamento(s) atualizado(s).',
+                    'resultados': {str(i): resultado for i, resultado in resultados.items()}})
+
+# Cancelar Agendamento (Admin - Form)
+@bp.route('/admin/cancelar/<int:agendamento_id>', methods=['POST'])
+@login_required
+def admin_cancelar_agendamento(agendamento_id):
+    if not current_user.is_admin:
+        return redirect(url_for('autenticacao.menu'))
+
+    motivo = request.form.get('motivo')
+    with mysql.transacao() as cur:
+        cur.execute("SELECT * FROM agendamentos WHERE id = %s FOR UPDATE", (agendamento_id,))
+        agendamento = cur.fetchone()
+        cur.execute("UPDATE agendamentos SET status = %s, motivo_cancelamento = %s WHERE id = %s", 
+                    ('Cancelado', motivo, agendamento_id))
+        if agendamento:
+            resumo.registrar_transicao(cur, agendamento, 'Cancelado')
+            versoes.incrementar_versao(cur, 'agendamentos', agendamento['data'])
+    if agendamento:
+        invalidar_visitas(agendamento['usuario_id'])
+        broker.publicar('agendamento_cancelado', {'id': agendamento_id, 'data': agendamento['data'],
+                                                  'horario': agendamento['horario'], 'motivo': motivo})
+    return redirect(url_for('administracao.admin_painel'))
+
+# Eventos ao vivo do painel (Admin - Server-Sent Events). Cada conexão ocupa uma thread do worker enquanto o
+# painel estiver aberto e só recebe os eventos deste processo (ver os limites em eventos.py)
+@bp.route('/admin/eventos')
+@login_required
+def admin_eventos():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Acesso não autorizado.'}), 403
+
+    try:
+        desde = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        desde = None
+
+    try:
+        assinatura = broker.assinar(desde)
+    except eventos.PainelLotado as e:
+        return jsonify({'success': False, 'message': str(e)}), 503, {'Retry-After': '30'}
+
+    def gerar():
+        with assinatura:
+            yield 'retry: 3000\n\n'
+            while True:
+                evento = assinatura.proximo(timeout=15)
+                yield eventos.formatar_sse(evento) if evento else ': keepalive\n\n'
+
+    resposta = Response(gerar(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Libera a vaga mesmo se o cliente cair antes do primeiro evento (o gerador nem chega a começar)
+    resposta.call_on_close(assinatura.cancelar)
+    return resposta
+
+# Catálogo de serviços (Admin): listar e cadastrar/alterar preço, duração (minutos) e disponibilidade
+@bp.route('/admin/servicos', methods=['GET', 'POST'])
+@login_required
+def admin_servicos():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Acesso não autorizado.'}), 403
+
+    if request.method == 'POST':
+        data = request.get_json()
+        try:
+            nome = data['nome'].strip()
+            preco = float(data['preco'])
+            ativo = bool(data.get('ativo', True))
+            duracao = int(data['duracao']) if data.get('duracao') is not None else None
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return jsonify({'success': False, 'message': 'Informe nome e preço válidos.'}), 400
+        if not nome or preco < 0:
+            return jsonify({'success': False, 'message': 'Informe nome e preço válidos.'}), 400
+        if duracao is not None and not 5 <= duracao <= 480:
+            return jsonify({'success': False, 'message': 'A duração deve ter entre 5 e 480 minutos.'}), 400
+        # Sem duração informada: serviço novo fica com o padrão da coluna, existente mantém a atual
+        with mysql.transacao() as cur:
+            cur.execute("""
+                INSERT INTO servicos (nome, preco, ativo, duracao) VALUES (%s, %s, %s, COALESCE(%s, DEFAULT(duracao)))
+                ON DUPLICATE KEY UPDATE preco = VALUES(preco), ativo = VALUES(ativo),
+                                        duracao = COALESCE(%s, duracao)
+            """, (nome, preco, ativo, duracao, duracao))
+            versoes.incrementar_versao(cur, 'servicos')
+        servicos.invalidar()
+
+    with mysql.cursor() as cur:
+        catalogo = list(servicos.catalogo(cur).values())
+    return jsonify({'success': True, 'servicos': catalogo})
+
+# Recursos de atendimento (Admin): listar e cadastrar/alterar capacidade, disponibilidade e horários da semana
+@bp.route('/admin/recursos', methods=['GET', 'POST'])
+@login_required
+def admin_recursos():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Acesso não autorizado.'}), 403
+
+    if request.method == 'POST':
+        data = request.get_json()
+        try:
+            with mysql.transacao() as cur:
+                recursos.salvar(cur, str(data['nome']).strip(), int(data.get('capacidade', 1)),
+                                bool(data.get('ativo', True)), data.get('horarios'))
+        except (KeyError, TypeError, AttributeError):
+            return jsonify({'success': False, 'message': 'Informe o nome do recurso.'}), 400
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        recursos.invalidar()
+
+    with mysql.cursor() as cur:
+        lista = recursos.listar(cur)
+    return jsonify({'success': True, 'recursos': lista})
+
+# Métricas do pool de conexões (checkouts, espera, esgotamentos) e do cache de usuários
+@bp.route('/admin/metricas')
+@login_required
+def metricas():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Acesso não autorizado.'}), 403
+    with mysql.cursor() as cur:
+        situacao_tarefas = tarefas.situacao(cur)
+    return jsonify({'success': True, 'pool': mysql.pool.metricas(), 'cache_usuarios': cache_usuarios.metricas(),
+                    'cache_visitas': cache_visitas.metricas(),
+                    'cache_respostas': cache_respostas.cache.metricas(), 'admissao': admissao.metricas(),
+                    'tarefas': situacao_tarefas})
@@ -0,0 +1,185 @@
+# Disponibilidade de horários, reservas, painel e cancelamento do cliente
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, jsonify
+from flask_login import login_required, current_user
+from datetime import datetime, timedelta
+import cliente
+from extensoes import broker, cache_respostas, invalidar_visitas, mysql, visitas_do_cliente
+import horarios
+import recursos
+import reservas
+import resumo
+import servicos
+import versoes
+
+bp = Blueprint('agendamento', __name__)
+
+# Duração do serviço escolhido (?servico=), ou None sem serviço; levanta servicos.ServicoInvalido
+def duracao_consultada(cur):
+    nome = request.args.get('servico')
+    return servicos.obter(cur, nome)['duracao'] if nome else None
+
+# Rota para buscar os horários disponíveis (para a duração do ?servico=, ou um intervalo da grade)
+@bp.route('/atualizar-horarios-disponiveis', methods=['GET'])
+@login_required
+@cache_respostas.condicional('agendamentos', 'configuracoes', 'servicos', 'recursos')
+def atualizar_horarios_disponiveis():
+    data_selecionada = request.args.get('data', datetime.today().strftime('%Y-%m-%d'))
+    try:
+        dia_semana = datetime.strptime(data_selecionada, '%Y-%m-%d').weekday()
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Data inválida: {str(e)}'}), 400
+
+    with mysql.cursor() as cur:
+        try:
+            duracao = duracao_consultada(cur)
+        except servicos.ServicoInvalido as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        cur.execute(recursos.CONSULTA_OCUPACAO_DIA, (data_selecionada, 'Ativo'))
+        agendamentos = cur.fetchall()
+        try:
+            horarios_disponiveis, intervalo_agendamento, horarios_ocupados = recursos.disponibilidade_do_dia(
+                cur, dia_semana, agendamentos, duracao)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': f'Formato de hora inválido nas configurações para {horarios.DIAS_SEMANA[dia_semana]}. Erro: {str(e)}'}), 500
+    return jsonify({
+        'success': True,
+        'horarios_disponiveis': list(horarios_disponiveis),
+        'horarios_ocupados': horarios_ocupados
+    })
+
+# Disponibilidade de vários dias de uma vez (ex.: próximos 30 dias), em bitmap por data
+# (para a duração do ?servico=, ou um intervalo da grade)
+@bp.route('/disponibilidade', methods=['GET'])
+@login_required
+@cache_respostas.condicional('agendamentos', 'configuracoes', 'servicos', 'recursos')
+def disponibilidade():
+    try:
+        inicio = datetime.strptime(request.args.get('inicio', datetime.today().strftime('%Y-%m-%d')), '%Y-%m-%d').date()
+        dias = int(request.args.get('dias', 30))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Parâmetros inválidos: {str(e)}'}), 400
+    if not 1 <= dias <= 62:
+        return jsonify({'success': False, 'message': 'O período deve ter entre 1 e 62 dias.'}), 400
+
+    fim = inicio + timedelta(days=dias)
+    with mysql.cursor() as cur:
+        try:
+            duracao = duracao_consultada(cur)
+        except servicos.ServicoInvalido as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        try:
+            grades = {dia: horarios.grade_do_dia(cur, dia) for dia in range(7)}
+            semana = recursos.da_semana(cur)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': f'Formato de hora inválido nas configurações. Erro: {str(e)}'}), 500
+        cur.execute(recursos.CONSULTA_OCUPACAO_PERIODO, (inicio, fim, 'Ativo'))
+        agendamentos = cur.fetchall()
+    por_dia = {}
+    for agendamento in agendamentos:
+        por_dia.setdefault(str(agendamento['data']), []).append(agendamento)
+
+    resultado = []
+    for i in range(dias):
+        data = inicio + timedelta(days=i)
+        grade, intervalo = grades[data.weekday()]
+        ocupados = recursos.horarios_indisponiveis(grade, semana[data.weekday()], por_dia.get(str(data), ()),
+                                                   duracao or intervalo)
+        resultado.append({
+            'data': data.strftime('%Y-%m-%d'),
+            'inicio': grade[0] if grade else None,
+            'intervalo': intervalo,
+            'total': len(grade),
+            'livres': horarios.codificar_disponibilidade(grade, set(ocupados)),
+        })
+    return jsonify({'success': True, 'dias': resultado})
+
+# Agendamento
+@bp.route('/agendar', methods=['GET', 'POST'])
+@login_required
+@cache_respostas.condicional('agendamentos', 'configuracoes', 'servicos', 'recursos')
+def agendar():
+    if request.method == 'POST':
+        data = request.form['data']
+        horario = request.form['horario']
+        servico = request.form['servico']
+        usuario_id = current_user.id
+        try:
+            with mysql.transacao() as cur:
+                agendamento_id, recurso = reservas.reservar(cur, usuario_id, data, horario, servico)
+        except reservas.DiaEmReserva as e:
+            return f"Erro: {str(e)}", 503, {'Retry-After': '1'}
+        except reservas.HorarioOcupado as e:
+            return f"Erro: {str(e)} Escolha outro horário.", 409
+        except reservas.ForaDoExpediente as e:
+            return f"Erro: {str(e)} Escolha outro horário.", 400
+        except servicos.ServicoInvalido as e:
+            return f"Erro: {str(e)}", 400
+        except ValueError as e:
+            return f"Erro: {str(e)}", 400
+        broker.publicar('agendamento_criado', {'id': agendamento_id, 'data': data, 'horario': horario,
+                                               'servico': servico, 'recurso': recurso['nome'],
+                                               'cliente_nome': current_user.nome})
+        return redirect(url_for('autenticacao.menu'))
+
+    data_selecionada = request.args.get('data', datetime.today().strftime('%Y-%m-%d'))
+    try:
+        dia_semana = datetime.strptime(data_selecionada, '%Y-%m-%d').weekday()
+    except ValueError:
+        return "Erro: Data inválida.", 400
+
+    with mysql.cursor() as cur:
+        try:
+            duracao = duracao_consultada(cur)
+        except servicos.ServicoInvalido as e:
+            return f"Erro: {str(e)}", 400
+        cur.execute(recursos.CONSULTA_OCUPACAO_DIA, (data_selecionada, 'Ativo'))
+        agendamentos = cur.fetchall()
+        try:
+            horarios_disponiveis, intervalo_agendamento, horarios_ocupados = recursos.disponibilidade_do_dia(
+                cur, dia_semana, agendamentos, duracao)
+        except ValueError as e:
+            return f"Erro: Formato de hora inválido nas configurações para {horarios.DIAS_SEMANA[dia_semana]}. Erro: {str(e)}", 500
+        configuracoes = horarios.configuracoes_semana(cur)
+    return render_template('agendamentos.html', usuario=current_user, 
+                         horarios_disponiveis=list(horarios_disponiveis), 
+                         horarios_ocupados=horarios_ocupados,
+                         data_selecionada=data_selecionada,
+                         configuracoes=configuracoes,
+                         intervalo_agendamento=intervalo_agendamento)
+
+# Painel do Cliente
+@bp.route('/client-panel')
+@login_required
+def client_panel():
+    agora = datetime.now()
+    try:
+        with mysql.cursor() as cur:
+            agendamentos_futuros = cliente.proximos(cur, current_user.id, agora)
+            agendamentos_passados, proximo_cursor = cliente.historico(
+                cur, current_user.id, agora, request.args.get('cursor'), current_app.config['CLIENTE_HISTORICO_POR_PAGINA'])
+            visitas = visitas_do_cliente(cur, current_user.id)
+    except ValueError:
+        return "Erro: Cursor de página inválido.", 400
+    return render_template('client-panel.html', usuario=current_user, 
+                         agendamentos_futuros=agendamentos_futuros, 
+                         agendamentos_passados=agendamentos_passados,
+                         proximo_cursor=proximo_cursor, visitas=visitas)
+
+# Cancelar Agendamento (Cliente)
+@bp.route('/cancelar-agendamento/<int:agendamento_id>', methods=['POST'])
+@login_required
+def cancelar_agendamento(agendamento_id):
+    motivo = request.form.get('motivo')
+    with mysql.transacao() as cur:
+        cur.execute("SELECT * FROM agendamentos WHERE id = %s AND usuario_id = %s FOR UPDATE", (agendamento_id, current_user.id))
+        agendamento = cur.fetchone()
+        cur.execute("UPDATE agendamentos SET status = %s, motivo_cancelamento = %s WHERE id = %s AND usuario_id = %s", 
+                    ('Cancelado', motivo, agendamento_id, current_user.id))
+        if agendamento:
+            resumo.registrar_transicao(cur, agendamento, 'Cancelado')
+            versoes.incrementar_versao(cur, 'agendamentos', agendamento['data'])
+    if agendamento:
+        invalidar_visitas(current_user.id)
+        broker.publicar('agendamento_cancelado', {'id': agendamento_id, 'data': agendamento['data'],
+                                                  'horario': agendamento['horario'], 'motivo': motivo})
+    return redirect(url_for('agendamento.client_panel'))
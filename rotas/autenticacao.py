@@ -0,0 +1,57 @@
+# Menu, cadastro, login e logout
+from flask import Blueprint, render_template, request, redirect, url_for
+from flask_login import login_user, login_required, logout_user, current_user
+
+from extensoes import Usuario, cache_usuarios, invalidar_usuario, mysql, senhas
+
+bp = Blueprint('autenticacao', __name__)
+
+# Menu (Página Inicial)
+@bp.route('/')
+@login_required
+def menu():
+    return render_template('index.html', usuario=current_user)
+
+# Cadastro
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if request.method == 'POST':
+        nome = request.form['nome']
+        email = request.form['email']
+        senha = request.form['senha']
+        senha_hash = senhas.gerar_hash(senha)
+        with mysql.transacao() as cur:
+            cur.execute("INSERT INTO usuarios (nome, email, senha, is_admin) VALUES (%s, %s, %s, %s)", (nome, email, senha_hash, 0))
+            usuario_id = cur.lastrowid
+        # O id pode ter pertencido a um usuário removido que ainda está no cache
+        invalidar_usuario(usuario_id)
+        return redirect(url_for('autenticacao.login'))
+    return render_template('register.html')
+
+# Login
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        email, senha = request.form['email'], request.form['senha']
+        with mysql.cursor() as cur:
+            cur.execute("SELECT * FROM usuarios WHERE email = %s", (email,))
+            user = cur.fetchone()
+        senha_correta, novo_hash = senhas.verificar(senha, user['senha']) if user else (False, None)
+        if senha_correta:
+            # Hash gravado com custo antigo: regravar com o custo atual
+            if novo_hash:
+                with mysql.transacao() as cur:
+                    cur.execute("UPDATE usuarios SET senha = %s WHERE id = %s", (novo_hash, user['id']))
+            dados = (user['id'], user['nome'], user['email'], user['is_admin'])
+            cache_usuarios.guardar(str(user['id']), dados)
+            login_user(Usuario(*dados))
+            return redirect(url_for('autenticacao.menu'))
+    return render_template('login.html')
+
+# Logout
+@bp.route('/logout')
+@login_required
+def logout():
+    invalidar_usuario(current_user.id)
+    logout_user()
+    return redirect(url_for('autenticacao.login'))
@@ -0,0 +1,59 @@
+# Financeiro (Admin): transações paginadas, exportação e cancelamentos do mês
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, Response, stream_with_context
+from flask_login import login_required, current_user
+from datetime import datetime
+from dashboard import intervalos_painel
+from extensoes import cache_respostas, mysql
+import transacoes
+
+bp = Blueprint('financas', __name__)
+
+# Detalhes dos Cancelamentos
+@bp.route('/admin/cancelamentos', methods=['GET'])
+@login_required
+@cache_respostas.condicional('agendamentos')
+def cancelamentos():
+    if not current_user.is_admin:
+        return redirect(url_for('autenticacao.menu'))
+
+    _, _, inicio_mes, fim_mes = intervalos_painel(datetime.now())
+    with mysql.cursor() as cur:
+        cancelamentos = transacoes.cancelamentos(cur, inicio_mes, fim_mes)
+    return render_template('cancelamentos.html', usuario=current_user, cancelamentos=cancelamentos)
+
+# Todas as Transações
+@bp.route('/admin/transacoes')
+@login_required
+@cache_respostas.condicional('agendamentos')
+def todas_transacoes():
+    if not current_user.is_admin:
+        return redirect(url_for('autenticacao.menu'))
+
+    cursor = request.args.get('cursor')
+    try:
+        with mysql.cursor() as cur:
+            todas_transacoes, proximo_cursor = transacoes.pagina(cur, cursor, current_app.config['TRANSACOES_POR_PAGINA'])
+    except ValueError:
+        return "Erro: Cursor de página inválido.", 400
+    return render_template('todas_transacoes.html', usuario=current_user, transacoes=todas_transacoes,
+                         proximo_cursor=proximo_cursor)
+
+# Exportar todas as transações (CSV ou JSON) em streaming
+@bp.route('/admin/transacoes/exportar')
+@login_required
+def exportar_transacoes():
+    if not current_user.is_admin:
+        return redirect(url_for('autenticacao.menu'))
+
+    formato = request.args.get('formato', 'csv')
+    if formato not in ('csv', 'json'):
+        return "Erro: Formato inválido (use csv ou json).", 400
+
+    def gerar():
+        with mysql.cursor(servidor=True) as cur:
+            gerador = transacoes.exportar_csv(cur) if formato == 'csv' else transacoes.exportar_json(cur)
+            yield from gerador
+
+    tipo = 'text/csv' if formato == 'csv' else 'application/json'
+    return Response(stream_with_context(gerar()), mimetype=tipo,
+                    headers={'Content-Disposition': f'attachment; filename=transacoes.{formato}'})
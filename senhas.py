@@ -0,0 +1,112 @@
+# Hash e verificação de senhas (bcrypt) num pool de processos com fila limitada
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as EsperaEsgotada
+import multiprocessing
+import os
+import threading
+
+import bcrypt
+
+# bcrypt considera só os primeiros 72 bytes da senha
+LIMITE_BYTES = 72
+
+
+class ServicoSaturado(Exception):
+    pass
+
+
+def _bytes(senha):
+    return senha.encode('utf-8')[:LIMITE_BYTES]
+
+
+def _gerar_hash(senha, custo):
+    return bcrypt.hashpw(_bytes(senha), bcrypt.gensalt(custo)).decode('utf-8')
+
+
+def _verificar(senha, senha_hash):
+    try:
+        return bcrypt.checkpw(_bytes(senha), senha_hash.encode('utf-8'))
+    except ValueError:
+        return False
+
+
+# Custo (log2 das rodadas) gravado num hash no formato $2b$12$...
+def custo_do_hash(senha_hash):
+    try:
+        return int(senha_hash.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class ServicoSenhas:
+    def __init__(self, app=None, custo=12, processos=None, fila=None, espera=10.0):
+        self.custo = custo
+        self.processos = processos or os.cpu_count() or 1
+        self.fila = fila or self.processos * 4
+        self.espera = espera
+        self._executor = None
+        self._lock = threading.Lock()
+        self._vagas = threading.BoundedSemaphore(self.fila)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SENHAS_CUSTO', self.custo)
+        app.config.setdefault('SENHAS_PROCESSOS', self.processos)
+        app.config.setdefault('SENHAS_FILA', app.config['SENHAS_PROCESSOS'] * 4)
+        app.config.setdefault('SENHAS_ESPERA', self.espera)
+        self.custo = app.config['SENHAS_CUSTO']
+        self.processos = app.config['SENHAS_PROCESSOS']
+        self.fila = app.config['SENHAS_FILA']
+        self.espera = app.config['SENHAS_ESPERA']
+        self._vagas = threading.BoundedSemaphore(self.fila)
+
+    # Criado no primeiro uso, para que cada worker de um servidor pre-fork tenha o seu pool. Os processos
+    # não nascem por fork do worker (que tem threads, conexões e locks abertos): forkserver, ou spawn onde
+    # forkserver não existe (Windows)
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._executor = ProcessPoolExecutor(max_workers=self.processos,
+                                                     mp_context=multiprocessing.get_context(metodo))
+            return self._executor
+
+    # Executa no pool; levanta ServicoSaturado se já houver `fila` operações pendentes ou se o resultado
+    # não sair em `espera` segundos
+    def _executar(self, funcao, *args):
+        if not self._vagas.acquire(blocking=False):
+            raise ServicoSaturado('Muitas operações de senha em andamento.')
+        try:
+            futuro = self._pool().submit(funcao, *args)
+        except Exception:
+            self._vagas.release()
+            raise
+        futuro.add_done_callback(lambda _: self._vagas.release())
+        try:
+            return futuro.result(timeout=self.espera)
+        except EsperaEsgotada:
+            futuro.cancel()
+            raise ServicoSaturado(f'Operação de senha sem resposta após {self.espera:g}s.') from None
+
+    def gerar_hash(self, senha):
+        return self._executar(_gerar_hash, senha, self.custo)
+
+    # Devolve (senha_correta, novo_hash); novo_hash vem preenchido quando o hash guardado usa um custo
+    # menor que o configurado e deve ser regravado. O novo hash é opcional: com o pool saturado, o login
+    # segue com o hash antigo e a troca fica para o próximo login
+    def verificar(self, senha, senha_hash):
+        if not self._executar(_verificar, senha, senha_hash):
+            return False, None
+        custo = custo_do_hash(senha_hash)
+        if custo is not None and custo < self.custo:
+            try:
+                return True, self.gerar_hash(senha)
+            except ServicoSaturado:
+                pass
+        return True, None
+
+    def encerrar(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
@@ -0,0 +1,98 @@
+# Catálogo de serviços (tabela servicos) com cache em memória invalidado pela versão da tabela
+import threading
+
+from versoes import versao_atual
+
+# Catálogo inicial, com os preços usados antes da tabela servicos existir
+CATALOGO_INICIAL = [
+    ('Corte Clássico', 40.00),
+    ('Corte Degradê', 45.00),
+    ('Barba Completa', 30.00),
+    ('Corte + Barba', 65.00),
+    ('Sobrancelha', 20.00),
+]
+
+MIGRACAO_CATALOGO = [
+    """
+        CREATE TABLE IF NOT EXISTS servicos (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            nome VARCHAR(100) NOT NULL UNIQUE,
+            preco DECIMAL(10, 2) NOT NULL,
+            ativo TINYINT(1) NOT NULL DEFAULT 1
+        )
+    """,
+    lambda cur: cur.executemany("INSERT IGNORE INTO servicos (nome, preco) VALUES (%s, %s)", CATALOGO_INICIAL),
+    """
+        ALTER TABLE agendamentos
+        ADD COLUMN servico_id INT NULL,
+        ADD COLUMN preco DECIMAL(10, 2) NOT NULL DEFAULT 0,
+        ADD KEY idx_agendamentos_servico_id (servico_id)
+    """,
+    # Preço histórico: o agendamento guarda o preço vigente quando foi feito
+    """
+        UPDATE agendamentos a
+        JOIN servicos s ON s.nome = a.servico
+        SET a.servico_id = s.id, a.preco = s.preco
+    """,
+]
+
+# Duração (minutos) de cada serviço do catálogo inicial
+DURACOES_INICIAIS = [
+    ('Corte Clássico', 30),
+    ('Corte Degradê', 40),
+    ('Barba Completa', 30),
+    ('Corte + Barba', 60),
+    ('Sobrancelha', 15),
+]
+
+
+# Como o preço, a duração fica no agendamento: mudar o catálogo não estica reservas já feitas
+def _migracao_duracao(tabela):
+    return [
+        f"ALTER TABLE {tabela} ADD COLUMN duracao SMALLINT NOT NULL DEFAULT 30",
+        f"""
+            UPDATE {tabela} a
+            JOIN servicos s ON s.id = a.servico_id
+            SET a.duracao = s.duracao
+        """,
+    ]
+
+
+MIGRACAO_DURACAO = [
+    "ALTER TABLE servicos ADD COLUMN duracao SMALLINT NOT NULL DEFAULT 30",
+    lambda cur: cur.executemany("UPDATE servicos SET duracao = %s WHERE nome = %s",
+                                [(duracao, nome) for nome, duracao in DURACOES_INICIAIS]),
+] + _migracao_duracao('agendamentos') + _migracao_duracao('agendamentos_arquivo')
+
+_lock = threading.Lock()
+_cache = {'versao': None, 'servicos': {}}
+
+
+class ServicoInvalido(ValueError):
+    pass
+
+
+def invalidar():
+    with _lock:
+        _cache['versao'] = None
+        _cache['servicos'] = {}
+
+
+# Todos os serviços, por nome: {'id', 'nome', 'preco', 'duracao', 'ativo'}
+def catalogo(cur):
+    versao = versao_atual(cur, 'servicos')
+    if versao != _cache['versao']:
+        cur.execute("SELECT id, nome, preco, duracao, ativo FROM servicos ORDER BY nome")
+        servicos = {servico['nome']: servico for servico in cur.fetchall()}
+        with _lock:
+            _cache['versao'] = versao
+            _cache['servicos'] = servicos
+    return _cache['servicos']
+
+
+# Serviço ativo com esse nome; levanta ServicoInvalido se não existir ou estiver desativado
+def obter(cur, nome):
+    servico = catalogo(cur).get(nome)
+    if not servico or not servico['ativo']:
+        raise ServicoInvalido(f'Serviço indisponível: {nome}.')
+    return servico
@@ -0,0 +1,258 @@
+# Tarefas em segundo plano (fechamento do dia, faltas, conferência do resumo) com
+# agenda persistente na tabela tarefas. Cada execução é reservada com um UPDATE condicional, então só um
+# worker roda cada tarefa; a reserva expira se o worker morrer no meio. Falhas são repetidas com espera
+# crescente, e a duração de cada execução fica registrada na própria tabela.
+# Os módulos de domínio são importados dentro de cada tarefa: o app importa este módulo para as métricas
+# e o agendador, e um worker web não deve carregar lote/resumo só por isso.
+from datetime import datetime, timedelta
+import logging
+import os
+import socket
+import threading
+import time
+
+log = logging.getLogger('barbearia.tarefas')
+
+ESQUEMA = """
+    CREATE TABLE IF NOT EXISTS tarefas (
+        nome VARCHAR(64) PRIMARY KEY,
+        proxima_execucao DATETIME NOT NULL,
+        reservada_por VARCHAR(100) NULL,
+        reservada_ate DATETIME NULL,
+        tentativas SMALLINT NOT NULL DEFAULT 0,
+        execucoes INT NOT NULL DEFAULT 0,
+        falhas INT NOT NULL DEFAULT 0,
+        ultima_execucao DATETIME NULL,
+        ultima_duracao_ms INT NULL,
+        duracao_total_ms BIGINT NOT NULL DEFAULT 0,
+        ultimo_erro TEXT NULL
+    )
+"""
+
+# A tarefa da véspera (preparar_dia_seguinte) aquecia só os caches do processo que a executava; sai da agenda
+MIGRACAO_SEM_VESPERA = ["DELETE FROM tarefas WHERE nome = 'preparar_dia_seguinte'"]
+
+# Tentativas por execução; a espera entre elas dobra a cada falha
+MAXIMO_TENTATIVAS = 3
+ESPERA_TENTATIVA = timedelta(minutes=1)
+# Tempo máximo de uma execução antes de outro worker poder assumir a tarefa
+DURACAO_RESERVA = timedelta(minutes=10)
+
+# Ativo que terminou há mais que isso sem ser concluído é falta
+TOLERANCIA_FALTA = timedelta(minutes=30)
+INTERVALO_FALTAS = timedelta(minutes=15)
+MOTIVO_FALTA = 'Não compareceu'
+HORA_CONFERENCIA = 3
+
+
+# Próximo fechamento da barbearia depois de `agora` (fim do expediente em configuracoes)
+def _proximo_fechamento(cur, agora):
+    import agenda
+    import horarios
+    for dias in range(8):
+        dia = agora.date() + timedelta(days=dias)
+        expediente = horarios.expediente(cur, dia.weekday())
+        if expediente and agenda.inicio(dia, expediente[1]) > agora:
+            return agenda.inicio(dia, expediente[1])
+    return agora + timedelta(days=1)
+
+
+def _diariamente(hora):
+    def proxima(cur, agora):
+        momento = datetime.combine(agora.date(), datetime.min.time()) + timedelta(hours=hora)
+        return momento if momento > agora else momento + timedelta(days=1)
+    return proxima
+
+
+# Fechamento: arquiva os concluídos até hoje (o que o botão "resetar cortes" faz à mão). Arquivados continuam
+# contando como atendimento realizado (resumo.STATUS_REALIZADOS) na receita do painel e nas transações
+def arquivar_concluidos(cur, agora):
+    import lote
+    arquivados = lote.arquivar(cur, data_fim=agora.date())
+    return {'data': agora.strftime('%Y-%m-%d'), 'ids': [a['id'] for a in arquivados]}
+
+
+# Ativos que já terminaram há mais de TOLERANCIA_FALTA sem serem concluídos: cancelados como falta
+CONSULTA_FALTAS = """
+    SELECT id FROM agendamentos
+    WHERE status = 'Ativo' AND data <= %s AND inicio + INTERVAL duracao MINUTE <= %s
+"""
+
+
+def marcar_faltas(cur, agora):
+    import lote
+    limite = agora - TOLERANCIA_FALTA
+    cur.execute(CONSULTA_FALTAS, (limite.date(), limite))
+    ids = [linha['id'] for linha in cur.fetchall()]
+    alterados = []
+    for i in range(0, len(ids), lote.MAXIMO_IDS):
+        alterados += lote.atualizar_status(cur, ids[i:i + lote.MAXIMO_IDS], 'Cancelado', MOTIVO_FALTA)[1]
+    return {'ids': [a['id'] for a in alterados]}
+
+
+# Madrugada: confere o resumo diário com agendamentos e o reconstrói se houver divergência. As telas que
+# leem o resumo validam o cache pela versão de 'agendamentos', que muda junto com a reconstrução
+def conferir_resumo(cur, agora):
+    import resumo
+    import versoes
+    divergencias = resumo.verificar(cur)
+    if divergencias:
+        resumo.reconstruir(cur)
+        versoes.incrementar_versao(cur, 'agendamentos')
+    return {'divergencias': len(divergencias)}
+
+
+# Nome -> (função (cur, agora) -> resultado, próxima execução (cur, agora) -> datetime)
+TAREFAS = {
+    'arquivar_concluidos': (arquivar_concluidos, _proximo_fechamento),
+    'marcar_faltas': (marcar_faltas, lambda cur, agora: agora + INTERVALO_FALTAS),
+    'conferir_resumo': (conferir_resumo, _diariamente(HORA_CONFERENCIA)),
+}
+
+
+# Estado de cada tarefa (execuções, falhas, durações, próxima execução e reserva)
+def situacao(cur):
+    cur.execute("""
+        SELECT nome, proxima_execucao, reservada_por, reservada_ate, tentativas, execucoes, falhas,
+               ultima_execucao, ultima_duracao_ms, duracao_total_ms, ultimo_erro
+        FROM tarefas ORDER BY nome
+    """)
+    return cur.fetchall()
+
+
+_SERIES = [
+    ('tarefa_execucoes_total', 'counter', 'Execuções concluídas por tarefa.', lambda t: t['execucoes']),
+    ('tarefa_falhas_total', 'counter', 'Execuções que falharam por tarefa.', lambda t: t['falhas']),
+    ('tarefa_duracao_segundos_total', 'counter', 'Tempo somado das execuções por tarefa.',
+     lambda t: t['duracao_total_ms'] / 1000),
+    ('tarefa_ultima_duracao_segundos', 'gauge', 'Duração da última execução por tarefa.',
+     lambda t: (t['ultima_duracao_ms'] or 0) / 1000),
+]
+
+
+# Situação no formato texto do Prometheus: vem da tabela, então vale para workers em outros processos
+def exportar(linhas):
+    saida = []
+    for nome, tipo, ajuda, valor in _SERIES:
+        saida.append(f'# HELP {nome} {ajuda}')
+        saida.append(f'# TYPE {nome} {tipo}')
+        saida.extend(f'{nome}{{tarefa="{tarefa["nome"]}"}} {valor(tarefa)}' for tarefa in linhas)
+    return '\n'.join(saida) + '\n'
+
+
+# Executa as tarefas vencidas, dentro do contexto do app (uma conexão do pool por rodada).
+# ao_concluir(nome, resultado) roda depois do commit de cada execução bem-sucedida.
+# Com TAREFAS_EM_PROCESSO, init_app já inicia o laço numa thread do servidor web.
+class Agendador:
+    def __init__(self, app=None, banco=None, tarefas=None, ao_concluir=None):
+        self._app = None
+        self._banco = banco
+        self.tarefas = TAREFAS if tarefas is None else tarefas
+        self.ao_concluir = ao_concluir
+        self._registradas = False
+        self._parar = threading.Event()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('TAREFAS_EM_PROCESSO', False)
+        app.config.setdefault('TAREFAS_INTERVALO', 30)
+        self._app = app
+        if app.config['TAREFAS_EM_PROCESSO']:
+            self.iniciar(app.config['TAREFAS_INTERVALO'])
+
+    # Calculada no uso: num servidor pre-fork o objeto é criado antes do fork de cada worker
+    @property
+    def identificacao(self):
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    # Cria as linhas que faltam, com a primeira execução calculada pela agenda de cada tarefa
+    def _registrar(self, cur, agora):
+        cur.executemany("INSERT IGNORE INTO tarefas (nome, proxima_execucao) VALUES (%s, %s)",
+                        [(nome, proxima(cur, agora)) for nome, (_, proxima) in self.tarefas.items()])
+        self._registradas = True
+
+    # Reserva a tarefa para este worker; False se não venceu ou outro worker já a reservou
+    def _reservar(self, nome, agora):
+        with self._banco.transacao() as cur:
+            cur.execute("""
+                UPDATE tarefas SET reservada_por = %s, reservada_ate = %s
+                WHERE nome = %s AND proxima_execucao <= %s AND (reservada_ate IS NULL OR reservada_ate < %s)
+            """, (self.identificacao, agora + DURACAO_RESERVA, nome, agora, agora))
+            return cur.rowcount == 1
+
+    def _finalizar(self, nome, proxima_execucao, tentativas, duracao_ms, erro):
+        with self._banco.transacao() as cur:
+            cur.execute("""
+                UPDATE tarefas
+                SET proxima_execucao = %s, tentativas = %s, reservada_por = NULL, reservada_ate = NULL,
+                    execucoes = execucoes + %s, falhas = falhas + %s, ultima_execucao = NOW(),
+                    ultima_duracao_ms = %s, duracao_total_ms = duracao_total_ms + %s, ultimo_erro = %s
+                WHERE nome = %s AND reservada_por = %s
+            """, (proxima_execucao, tentativas, int(erro is None), int(erro is not None), duracao_ms, duracao_ms, erro,
+                  nome, self.identificacao))
+
+    # Uma execução da tarefa já reservada; devolve True se deu certo
+    def _rodar(self, nome, tentativas):
+        funcao, proxima = self.tarefas[nome]
+        inicio = time.perf_counter()
+        try:
+            with self._banco.transacao() as cur:
+                resultado = funcao(cur, datetime.now())
+        except Exception as e:
+            duracao_ms = round((time.perf_counter() - inicio) * 1000)
+            tentativas += 1
+            log.exception('Tarefa %s falhou (tentativa %d de %d)', nome, tentativas, MAXIMO_TENTATIVAS)
+            if tentativas < MAXIMO_TENTATIVAS:
+                seguinte = datetime.now() + ESPERA_TENTATIVA * 2 ** (tentativas - 1)
+            else:
+                with self._banco.cursor() as cur:
+                    seguinte = proxima(cur, datetime.now())
+                tentativas = 0
+            self._finalizar(nome, seguinte, tentativas, duracao_ms, f'{type(e).__name__}: {e}')
+            return False
+
+        duracao_ms = round((time.perf_counter() - inicio) * 1000)
+        with self._banco.cursor() as cur:
+            seguinte = proxima(cur, datetime.now())
+        self._finalizar(nome, seguinte, 0, duracao_ms, None)
+        log.info('Tarefa %s concluída em %d ms: %s', nome, duracao_ms, resultado)
+        if self.ao_concluir is not None:
+            try:
+                self.ao_concluir(nome, resultado)
+            except Exception:
+                log.exception('Falha ao notificar a conclusão da tarefa %s', nome)
+        return True
+
+    # Roda uma vez as tarefas vencidas; devolve {nome: True | False} das que este worker executou
+    def executar_pendentes(self):
+        with self._app.app_context():
+            agora = datetime.now()
+            with self._banco.transacao() as cur:
+                if not self._registradas:
+                    self._registrar(cur, agora)
+                cur.execute("""
+                    SELECT nome, tentativas FROM tarefas
+                    WHERE proxima_execucao <= %s AND (reservada_ate IS NULL OR reservada_ate < %s)
+                """, (agora, agora))
+                vencidas = [(linha['nome'], linha['tentativas']) for linha in cur.fetchall() if linha['nome'] in self.tarefas]
+            return {nome: self._rodar(nome, tentativas) for nome, tentativas in vencidas if self._reservar(nome, agora)}
+
+    # Laço do worker: procura tarefas vencidas a cada `intervalo` segundos até parar() ser chamado
+    def rodar(self, intervalo=30):
+        while not self._parar.is_set():
+            try:
+                self.executar_pendentes()
+            except Exception:
+                log.exception('Falha ao procurar tarefas vencidas')
+            self._parar.wait(intervalo)
+
+    # Agendador em processo: o mesmo laço numa thread daemon do servidor web
+    def iniciar(self, intervalo=30):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.rodar, args=(intervalo,), name='tarefas', daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
@@ -0,0 +1,124 @@
+# Transações (atendimentos realizados: concluídos e já arquivados, na tabela quente e no arquivo frio):
+# paginação por chave e exportação em streaming; cancelamentos do período
+import csv
+from decimal import Decimal
+import io
+import json
+
+import arquivo
+from resumo import STATUS_REALIZADOS
+
+_SELECT = """
+    SELECT a.id, a.servico, a.data, a.horario, a.preco AS valor
+    FROM {tabela} a
+    WHERE a.status = %s
+"""
+
+_DEPOIS_DO_CURSOR = """
+    AND (a.data < %s OR (a.data = %s AND (a.horario < %s OR (a.horario = %s AND a.id < %s))))
+"""
+
+_ORDEM = " ORDER BY data DESC, horario DESC, id DESC"
+
+COLUNAS = ['id', 'servico', 'data', 'horario', 'valor']
+
+
+# Uma parte por (status, tabela), cada uma percorrendo o índice (status, data, horario) já na ordem da
+# página e cortada no limite; a união só reordena essas poucas linhas
+def _consulta(filtro='', limite=''):
+    partes = [arquivo.em_ambas(_SELECT + filtro + _ORDEM + limite) for _ in STATUS_REALIZADOS]
+    return "SELECT * FROM (" + " UNION ALL ".join(partes) + ") t" + _ORDEM + limite
+
+
+# Primeira página e páginas seguintes (a partir da chave data, horario, id da última linha exibida)
+CONSULTA_PAGINA = _consulta(limite=" LIMIT %s")
+CONSULTA_PAGINA_CURSOR = _consulta(_DEPOIS_DO_CURSOR, " LIMIT %s")
+_CONSULTA_TODAS = _consulta()
+
+
+# Parâmetros de CONSULTA_PAGINA (chave None) ou CONSULTA_PAGINA_CURSOR (chave = (data, horario, id))
+def parametros_pagina(chave=None, limite=50):
+    filtro = (chave[0], chave[0], chave[1], chave[1], chave[2]) if chave else ()
+    return tuple(p for status in STATUS_REALIZADOS for _ in range(2) for p in (status,) + filtro + (limite,)) + (limite,)
+
+CONSULTA_CANCELAMENTOS = """
+    SELECT a.*, u.nome AS cliente_nome
+    FROM agendamentos a
+    JOIN usuarios u ON a.usuario_id = u.id
+    WHERE a.data >= %s AND a.data < %s AND a.status = 'Cancelado'
+"""
+
+
+# Cursor de página no formato "AAAA-MM-DD_HH:MM_id" (chave da última linha exibida)
+def codificar_cursor(transacao):
+    return f"{transacao['data']}_{transacao['horario']}_{transacao['id']}"
+
+
+# Levanta ValueError se o cursor for inválido
+def decodificar_cursor(cursor):
+    data, horario, agendamento_id = cursor.split('_', 2)
+    return data, horario, int(agendamento_id)
+
+
+# Uma página de transações, da mais recente para a mais antiga, a partir do cursor (exclusive).
+# Devolve (transacoes, proximo_cursor); proximo_cursor é None na última página.
+def pagina(cur, cursor=None, limite=50):
+    if cursor:
+        cur.execute(CONSULTA_PAGINA_CURSOR, parametros_pagina(decodificar_cursor(cursor), limite + 1))
+    else:
+        cur.execute(CONSULTA_PAGINA, parametros_pagina(limite=limite + 1))
+    transacoes = cur.fetchall()
+    if len(transacoes) > limite:
+        transacoes = transacoes[:limite]
+        return transacoes, codificar_cursor(transacoes[-1])
+    return transacoes, None
+
+
+# Agendamentos cancelados num intervalo semiaberto [inicio, fim), com o nome do cliente
+def cancelamentos(cur, inicio, fim):
+    cur.execute(CONSULTA_CANCELAMENTOS, (inicio, fim))
+    return cur.fetchall()
+
+
+def _linhas(cur, lote):
+    cur.execute(_CONSULTA_TODAS, tuple(status for status in STATUS_REALIZADOS for _ in range(2)))
+    while True:
+        linhas = cur.fetchmany(lote)
+        if not linhas:
+            break
+        yield linhas
+
+
+def _valor(v):
+    if isinstance(v, Decimal):
+        return float(v)
+    if hasattr(v, 'isoformat'):
+        return v.isoformat()
+    return v
+
+
+# Gera o CSV em blocos; `cur` deve ser um cursor do lado do servidor (memória constante)
+def exportar_csv(cur, lote=1000):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUNAS)
+    for linhas in _linhas(cur, lote):
+        for linha in linhas:
+            escritor.writerow([_valor(linha[coluna]) for coluna in COLUNAS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+# Gera um array JSON em blocos; `cur` deve ser um cursor do lado do servidor
+def exportar_json(cur, lote=1000):
+    yield '['
+    primeiro = True
+    for linhas in _linhas(cur, lote):
+        partes = []
+        for linha in linhas:
+            partes.append(('' if primeiro else ',') + json.dumps({coluna: _valor(linha[coluna]) for coluna in COLUNAS}))
+            primeiro = False
+        yield ''.join(partes)
+    yield ']'
@@ -0,0 +1,40 @@
+# Versões por tabela, guardadas no banco: mudam a cada alteração e invalidam os caches de todos os workers.
+# Cada tabela tem FRACOES contadores (linhas) e a versão é a soma deles: o incremento trava só a linha da
+# fração até o commit, e escritas em frações diferentes (ex.: reservas de dias diferentes) não se esperam.
+import random
+import zlib
+
+FRACOES = 16
+
+MIGRACAO_FRACOES = [
+    """
+        ALTER TABLE versoes_tabelas
+        ADD COLUMN fracao TINYINT UNSIGNED NOT NULL DEFAULT 0,
+        DROP PRIMARY KEY,
+        ADD PRIMARY KEY (tabela, fracao)
+    """,
+]
+
+
+# Versão de uma tabela; muda sempre que ela é alterada (compartilhada entre os workers pelo banco)
+def versao_atual(cur, tabela):
+    cur.execute("SELECT CAST(SUM(versao) AS SIGNED) AS versao FROM versoes_tabelas WHERE tabela = %s", (tabela,))
+    return cur.fetchone()['versao'] or 0
+
+
+# Versões de várias tabelas numa consulta: {tabela: versao}
+def versoes_atuais(cur, tabelas):
+    cur.execute(f"SELECT tabela, CAST(SUM(versao) AS SIGNED) AS versao FROM versoes_tabelas "
+                f"WHERE tabela IN ({', '.join(['%s'] * len(tabelas))}) GROUP BY tabela", tuple(tabelas))
+    versoes = {linha['tabela']: linha['versao'] for linha in cur.fetchall()}
+    return {tabela: versoes.get(tabela, 0) for tabela in tabelas}
+
+
+# Marca a tabela como alterada; chamar na mesma transação da alteração. `chave` escolhe a fração (escritas
+# já serializadas entre si, como as reservas de um mesmo dia, passam a data); sem chave, uma fração ao acaso.
+def incrementar_versao(cur, tabela, chave=None):
+    fracao = random.randrange(FRACOES) if chave is None else zlib.crc32(str(chave).encode()) % FRACOES
+    cur.execute("""
+        INSERT INTO versoes_tabelas (tabela, fracao, versao) VALUES (%s, %s, 1)
+        ON DUPLICATE KEY UPDATE versao = versao + 1
+    """, (tabela, fracao))